@@ -0,0 +1,142 @@
+"""
+PCT and QOL stage applied after MI rating
+Table 3.1 (partially contributing) and Table 2.2 (QOL addition) as dense MI-indexed arrays
+"""
+
+import logging
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app_simplified.core.tables import MAX_MI, MatrixTableEvaluator, MIBandTableEvaluator, normalize_key
+
+logger = logging.getLogger(__name__)
+
+PCT_TABLE_ID = "3.1"
+QOL_TABLE_ID = "2.2_qol_addition_by_mi_band"
+
+# Table 3.1 column headers: ">=95", "75–94", "<15"
+MI_BAND_LABEL = re.compile(r"(>=|≥|<=|≤|>|<)?\s*(\d+)(?:\s*[-–—]\s*(\d+))?")
+
+
+def mi_band_columns(labels: Sequence[Any]) -> Optional[np.ndarray]:
+    """
+    Column index for each whole MI 0-100 from MI band headers
+
+    None when a header is not an MI band or the bands leave an MI uncovered.
+    """
+    columns = np.full(MAX_MI + 1, -1, dtype=np.intp)
+    for i, label in enumerate(labels):
+        match = MI_BAND_LABEL.fullmatch(str(label).strip())
+        if match is None:
+            return None
+        op, low, high = match.group(1), int(match.group(2)), match.group(3)
+        if high is not None and op is None:
+            high = int(high)
+        elif op in (">=", "≥"):
+            high = MAX_MI
+        elif op == ">":
+            low, high = low + 1, MAX_MI
+        elif op in ("<=", "≤"):
+            low, high = 0, low
+        elif op == "<":
+            low, high = 0, low - 1
+        else:
+            return None
+        columns[max(low, 0):min(high, MAX_MI) + 1] = i
+    return columns if (columns >= 0).all() else None
+
+
+class PctQolStage:
+    """
+    MI -> MI' through Table 3.1, then the Table 2.2 QOL addition
+
+    pct[row, mi] holds MI' for each contribution band and qol[level, mi] the
+    QOL addition for each level. Row and level 0 are the defaults: a condition
+    with no contribution band is fully service related (MI' = MI), and a case
+    with no QOL level gets no addition. Every lookup is a single array index.
+    """
+
+    def __init__(self, pct_table: Optional[MatrixTableEvaluator], qol_table: Optional[MIBandTableEvaluator]):
+        identity = np.arange(MAX_MI + 1, dtype=np.intp)[None, :]
+        no_addition = np.zeros((1, MAX_MI + 1), dtype=np.intp)
+
+        # Table 3.1 columns are MI bands: each MI reads the column of the band it falls in
+        if pct_table is not None and pct_table.mi_values.size:
+            columns = mi_band_columns(pct_table.cols)
+            if columns is None:
+                if (pct_table.mi_values != pct_table.mi_values[:, :1, :]).any():
+                    raise ValueError(
+                        f"Table {pct_table.table_id} columns {pct_table.cols} are not MI bands and their values differ"
+                    )
+                columns = np.zeros(MAX_MI + 1, dtype=np.intp)
+            self.pct = np.vstack([identity, pct_table.mi_values[:, columns, np.arange(MAX_MI + 1)]])
+            self.contribution_bands = list(pct_table.rows)
+            self.contribution_index = {key: i + 1 for key, i in pct_table.row_index.items()}
+        else:
+            self.pct = identity
+            self.contribution_bands = []
+            self.contribution_index = {}
+
+        if qol_table is not None:
+            self.qol = np.vstack([no_addition, qol_table.additions])
+            self.qol_levels = list(qol_table.level_codes)
+            self.qol_level_index = {normalize_key(code): i + 1 for i, code in enumerate(qol_table.level_codes)}
+        else:
+            self.qol = no_addition
+            self.qol_levels = []
+            self.qol_level_index = {}
+
+    def contribution_row(self, contribution: Optional[str]) -> int:
+        """pct row for a Table 3.1 contribution band (0 when none is given)"""
+        if not contribution:
+            return 0
+        row = self.contribution_index.get(normalize_key(contribution))
+        if row is None:
+            raise ValueError(f"Unknown contribution band '{contribution}', expected one of {self.contribution_bands}")
+        return row
+
+    def qol_row(self, level: Optional[str]) -> int:
+        """qol row for a Table 2.2 QOL level (0 when none is given)"""
+        if not level:
+            return 0
+        row = self.qol_level_index.get(normalize_key(level))
+        if row is None:
+            raise ValueError(f"Unknown QOL level '{level}', expected one of {self.qol_levels}")
+        return row
+
+    @staticmethod
+    def clip_mi(values: Any) -> np.ndarray:
+        """Whole-percent MI clipped to the table range"""
+        return np.clip(np.rint(np.asarray(values, dtype=np.float64)), 0, MAX_MI).astype(np.intp)
+
+    def apply_pct(self, ratings: Sequence[float], contributions: Sequence[Optional[str]]) -> List[int]:
+        """MI' for one case's condition ratings"""
+        rows = np.asarray([self.contribution_row(c) for c in contributions], dtype=np.intp)
+        return self.pct[rows, self.clip_mi(ratings)].tolist() if len(rows) else []
+
+    def qol_addition(self, combined_mi: float, level: Optional[str]) -> int:
+        """Table 2.2 addition for a case's combined MI'"""
+        return int(self.qol[self.qol_row(level), self.clip_mi(combined_mi)])
+
+    def apply_pct_batch(self, ratings: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """MI' for a (cases x conditions) rating array and matching contribution rows"""
+        return self.pct[rows, self.clip_mi(ratings)]
+
+    def qol_addition_batch(self, combined_mi: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Table 2.2 additions for per-case combined MI' and QOL rows"""
+        return self.qol[rows, self.clip_mi(combined_mi)]
+
+    def describe_pct(
+        self,
+        ratings: Sequence[int],
+        contributions: Sequence[Optional[str]],
+        mi_prime: Sequence[int]
+    ) -> List[Tuple[int, Optional[str], int]]:
+        """(MI, contribution band, MI') for each partially contributing condition"""
+        return [
+            (mi, contribution, prime)
+            for mi, contribution, prime in zip(ratings, contributions, mi_prime)
+            if contribution and prime != mi
+        ]
@@ -0,0 +1,216 @@
+"""
+Persistent case assessment history
+Embedded SQLite store (WAL mode) with a batching background writer and keyset pagination
+"""
+
+import base64
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Most assessments one history page returns
+MAX_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    assessment_id TEXT,
+    case_id TEXT NOT NULL,
+    assessed_at TEXT NOT NULL,
+    assessment_date TEXT,
+    total_rating INTEGER,
+    conditions_assessed INTEGER,
+    rules_version TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_case_assessed_at ON assessments (case_id, assessed_at);
+CREATE INDEX IF NOT EXISTS assessments_assessment_id ON assessments (assessment_id);
+"""
+
+INSERT = """
+INSERT INTO assessments (
+    assessment_id, case_id, assessed_at, assessment_date,
+    total_rating, conditions_assessed, rules_version, result
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SUMMARY_COLUMNS = (
+    "id, assessment_id, assessed_at, assessment_date, total_rating, conditions_assessed, rules_version"
+)
+
+# Queue marker that stops the writer thread
+_STOP = object()
+
+
+def encode_cursor(assessed_at: str, row_id: int) -> str:
+    """Opaque cursor for the page after the given row"""
+    return base64.urlsafe_b64encode(json.dumps([assessed_at, row_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(assessed_at, row id) from a cursor returned by get_history"""
+    try:
+        assessed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(assessed_at), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid history cursor '{cursor}'")
+
+
+class CaseHistoryStore:
+    """
+    Assessment results persisted per case
+
+    record() only enqueues; a single writer thread commits queued results in
+    batches of up to batch_size per transaction, so the caller never waits on
+    disk. Reads use one connection per thread, which WAL mode lets run
+    alongside the writer. Results are visible once their batch commits.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        self.written = 0
+        self.failed = 0
+        self.closed = False
+
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+        self._writer = threading.Thread(target=self._write_loop, name="case-history-writer", daemon=True)
+        self._writer.start()
+        logger.info(f"Case history store opened at {path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection to the store"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _row(result: Dict[str, Any]) -> Tuple:
+        """INSERT parameters for one assessment result"""
+        assessed_at = result.get("assessed_at")
+        assessed_at = assessed_at.isoformat() if hasattr(assessed_at, "isoformat") else str(assessed_at)
+        return (
+            result.get("assessment_id"),
+            result["case_id"],
+            assessed_at,
+            result.get("assessment_date"),
+            result.get("total_disability_rating"),
+            len(result.get("individual_conditions") or []),
+            result.get("rules_version"),
+            json.dumps(result, default=str)
+        )
+
+    def _write_loop(self):
+        """Commit queued results in batches until stopped"""
+        connection = self._connection()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while item is not _STOP and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            results = [result for result in batch if result is not _STOP]
+            if results:
+                try:
+                    rows = [self._row(result) for result in results]
+                    with connection:
+                        connection.executemany(INSERT, rows)
+                    self.written += len(rows)
+                except Exception as e:
+                    self.failed += len(results)
+                    logger.error(f"Case history write error ({len(results)} assessments lost): {e}")
+
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is _STOP:
+                connection.close()
+                return
+
+    def record(self, result: Dict[str, Any]):
+        """Queue an assessment result for writing (results without a case_id are skipped)"""
+        if self.closed:
+            logger.warning(f"Case history store is closed, assessment {result.get('assessment_id')} not recorded")
+        elif result.get("case_id"):
+            self._queue.put(result)
+
+    def flush(self):
+        """Block until every queued result has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer"""
+        self.closed = True
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def get_history(
+        self,
+        case_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include_results: bool = False
+    ) -> Dict[str, Any]:
+        """
+        One page of a case's assessments, newest first
+
+        Pages are taken from the (case_id, assessed_at) index by keyset, so a
+        page costs the same however deep it is. Pass the returned next_cursor
+        to fetch the following page; it is None on the last page.
+        """
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        columns = SUMMARY_COLUMNS + (", result" if include_results else "")
+        query = f"SELECT {columns} FROM assessments WHERE case_id = ?"
+        params: List[Any] = [case_id]
+        if cursor:
+            query += " AND (assessed_at, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        query += " ORDER BY assessed_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connection().execute(query, params).fetchall()
+        page = rows[:limit]
+        assessments = []
+        for row in page:
+            entry = {
+                "assessment_id": row[1],
+                "assessed_at": row[2],
+                "assessment_date": row[3],
+                "total_rating": row[4],
+                "conditions_assessed": row[5],
+                "rules_version": row[6]
+            }
+            if include_results:
+                entry["result"] = json.loads(row[7])
+            assessments.append(entry)
+
+        return {
+            "assessments": assessments,
+            "next_cursor": encode_cursor(page[-1][2], page[-1][0]) if len(rows) > limit else None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer counters"""
+        return {
+            "path": self.path,
+            "written": self.written,
+            "pending": self._queue.qsize(),
+            "failed": self.failed
+        }
@@ -29,11 +29,39 @@ class Settings(BaseSettings):
     # File processing
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_file_types: str = ".pdf,.docx,.txt,.json"
+    # Uploads extracted and analysed at once by the background ingestion queue
+    ingestion_workers: int = 2
+    # PDF/DOCX text extraction processes (0 = one per CPU) and seconds one document may take
+    extraction_workers: int = 0
+    extraction_timeout: float = 300.0
     
     # Data paths
     rules_path: str = "app_simplified/data/rules"
     documents_path: str = "app_simplified/data/documents"
     
+    # ToD rules hot reload (seconds between checks of the rules JSON, 0 disables the watcher)
+    rules_watch_interval: float = 0.0
+    
+    # Assessment result cache (entries, 0 disables; seconds before an entry expires)
+    result_cache_size: int = 1024
+    result_cache_ttl: float = 300.0
+    
+    # Per-condition results kept for incremental reassessment (assessments, seconds)
+    assessment_memo_size: int = 256
+    assessment_memo_ttl: float = 3600.0
+    
+    # Per-condition assessment pool ("thread" or "process"), its size, and the
+    # most conditions one request may have in flight at once
+    assessment_executor: str = "thread"
+    assessment_workers: int = 4
+    assessment_concurrency: int = 8
+    # Cases /assess/stream assesses at once
+    assessment_stream_concurrency: int = 16
+    
+    # SQLite case history store ("" disables persistence) and assessments per write transaction
+    case_history_path: str = "./case_history.db"
+    case_history_batch_size: int = 256
+    
     # Development settings
     enable_detailed_logging: bool = True
     mock_auth_user_id: str = "test-user-001"
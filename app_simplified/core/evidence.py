@@ -0,0 +1,168 @@
+"""
+Case-level medical evidence scanner
+One Aho-Corasick automaton over every condition's terms; each document is scanned once
+"""
+
+import logging
+import string
+from collections import deque
+from typing import Dict, List, Any, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A condition named within this leading fraction of a document (diagnosis,
+# impression or reason-for-referral sections) is treated as its subject
+HIGH_RELEVANCE_FRACTION = 0.25
+
+# Positions kept per document and condition in scan results
+MAX_POSITIONS = 20
+
+# Punctuation and symbols become word separators (str.translate + split runs in C)
+WORD_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + "\u2013\u2014\u2018\u2019\u201c\u201d\u2022\u00b7\u2026"})
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over word sequences
+
+    Patterns and text are both split into lowercase words (see split_words), so
+    matches always fall on word boundaries ("ear" never matches inside "year")
+    and the automaton steps once per word rather than once per character.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, ...]]):
+        self.patterns = patterns
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for word in pattern:
+                next_state = self.goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][word] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(pattern_id)
+
+        # Breadth-first failure links; outputs are merged along them so each
+        # state lists every pattern ending there
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(word, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, words: List[str]) -> Iterator[Tuple[int, int, int]]:
+        """Yield (pattern_id, first word index, last word index) for every match"""
+        goto, fail, output = self.goto, self.fail, self.output
+        root = goto[0]
+        state = 0
+        for index, word in enumerate(words):
+            if not state and word not in root:
+                continue
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for pattern_id in output[state]:
+                yield pattern_id, index - len(self.patterns[pattern_id]) + 1, index
+
+
+def split_words(text: str) -> List[str]:
+    """Lowercase words of a text, punctuation dropped"""
+    return text.lower().translate(WORD_SEPARATORS).split()
+
+
+class EvidenceScanner:
+    """
+    Scans a case's evidence for all of its conditions at once
+
+    Each condition contributes name terms (what the veteran claimed and the
+    matched ToD name) and supporting terms (ToD keywords and symptoms).
+    """
+
+    def __init__(self, condition_terms: List[Tuple[List[str], List[str]]]):
+        # term words -> {condition index: is a name term}; a name wins over the same supporting term
+        owners: Dict[Tuple[str, ...], Dict[int, bool]] = {}
+        for condition_index, (names, supporting) in enumerate(condition_terms):
+            for is_name, terms in ((True, names), (False, supporting)):
+                for term in terms:
+                    words = tuple(split_words(term or ""))
+                    if words and len(" ".join(words)) >= 3:
+                        term_owners = owners.setdefault(words, {})
+                        term_owners[condition_index] = term_owners.get(condition_index, False) or is_name
+
+        self.condition_count = len(condition_terms)
+        self.owners = [list(term_owners.items()) for term_owners in owners.values()]
+        self.automaton = AhoCorasick(list(owners.keys()))
+
+    def scan(self, medical_evidence: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Matches per condition, each a list of per-document hits
+
+        A hit records the document index and source, match positions, the first
+        name and first supporting positions, and the document length. Positions
+        and length are in words; a position pair is [first word, end word).
+        """
+        hits: List[Dict[int, Dict[str, Any]]] = [{} for _ in range(self.condition_count)]
+        for document_index, evidence in enumerate(medical_evidence):
+            words = split_words(evidence.get("content") or "")
+            for pattern_id, start, end in self.automaton.iter_matches(words):
+                for condition_index, is_name in self.owners[pattern_id]:
+                    hit = hits[condition_index].get(document_index)
+                    if hit is None:
+                        hit = hits[condition_index][document_index] = {
+                            "document": document_index,
+                            "source": evidence.get("source", ""),
+                            "length": len(words),
+                            "match_count": 0,
+                            "first_name_position": None,
+                            "first_term_position": None,
+                            "positions": []
+                        }
+                    hit["match_count"] += 1
+                    first_key = "first_name_position" if is_name else "first_term_position"
+                    if hit[first_key] is None:
+                        hit[first_key] = start
+                    if len(hit["positions"]) < MAX_POSITIONS:
+                        hit["positions"].append([start, end + 1, " ".join(self.automaton.patterns[pattern_id])])
+
+        return [
+            [{**hit, "relevance": relevance(hit)} for _, hit in sorted(condition_hits.items())]
+            for condition_hits in hits
+        ]
+
+
+def relevance(hit: Dict[str, Any]) -> str:
+    """
+    Relevance of one document to a condition from where it is mentioned
+
+    high: the condition is named in the leading part of the document
+    medium: named later on, or only its keywords/symptoms appear up front
+    low: only keywords/symptoms, and only further down
+    """
+    leading = HIGH_RELEVANCE_FRACTION * max(hit["length"], 1)
+    name_position = hit["first_name_position"]
+    if name_position is not None:
+        return "high" if name_position <= leading else "medium"
+    term_position = hit["first_term_position"]
+    return "medium" if term_position is not None and term_position <= leading else "low"
+
+
+def scan_evidence(
+    condition_terms: List[Tuple[List[str], List[str]]],
+    medical_evidence: List[Dict[str, Any]]
+) -> List[List[Dict[str, Any]]]:
+    """Build a scanner and scan the evidence (picklable entry point for worker pools)"""
+    if not medical_evidence or not condition_terms:
+        return [[] for _ in condition_terms]
+    return EvidenceScanner(condition_terms).scan(medical_evidence)
@@ -0,0 +1,151 @@
+"""
+Condition name matchers for VAC ToD lookups
+Pluggable strategies used by VACDataManager.find_condition
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Set, Tuple
+from fuzzywuzzy import fuzz
+
+logger = logging.getLogger(__name__)
+
+
+def score_term(query: str, term: str) -> int:
+    """Score a query against a single search term (best of three fuzzy scorers)"""
+    return max(
+        fuzz.ratio(query, term),
+        fuzz.partial_ratio(query, term),
+        fuzz.token_sort_ratio(query, term)
+    )
+
+
+def partial_score(query: str, text: str) -> int:
+    """Best fuzzy score of a query against any substring of a text"""
+    return fuzz.partial_ratio(query, text)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a string, padded so short words still produce grams"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LinearMatcher:
+    """
+    Scores every search term of every condition
+    Exact but O(conditions x terms) per lookup - kept as a reference matcher
+    """
+
+    def __init__(self):
+        self.search_index = {}
+
+    def build(self, search_index: Dict[str, Dict[str, Any]]):
+        """Attach the search index built by VACDataManager"""
+        self.search_index = search_index
+
+    def best_match(self, query: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Return (best condition, score) for an already normalised query"""
+        best_match = None
+        best_score = 0
+
+        for index_data in self.search_index.values():
+            primary_score = fuzz.ratio(query, index_data["primary_name"])
+            if primary_score > best_score:
+                best_score = primary_score
+                best_match = index_data["condition"]
+
+            for term in index_data["search_terms"]:
+                if not term:
+                    continue
+
+                # Exact match gets priority
+                if query == term:
+                    return index_data["condition"], 100
+
+                score = score_term(query, term)
+                if score > best_score:
+                    best_score = score
+                    best_match = index_data["condition"]
+
+        return best_match, best_score
+
+
+class TrigramMatcher:
+    """
+    Character-trigram inverted index over condition search terms
+    Narrows each lookup to a handful of candidate terms before fuzzy scoring
+    """
+
+    def __init__(self, candidate_limit: int = 10):
+        self.candidate_limit = candidate_limit
+        self.terms: List[Tuple[str, str]] = []  # (term, condition_id)
+        self.term_grams: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.exact_terms: Dict[str, str] = {}
+        self.conditions: Dict[str, Dict[str, Any]] = {}
+
+    def build(self, search_index: Dict[str, Dict[str, Any]]):
+        """Build the inverted index from VACDataManager's search index"""
+        postings = defaultdict(list)
+        self.terms = []
+        self.term_grams = []
+        self.exact_terms = {}
+        self.conditions = {}
+
+        for condition_id, index_data in search_index.items():
+            self.conditions[condition_id] = index_data["condition"]
+
+            # The primary name is also the first search term, so one entry covers both
+            terms = [index_data["primary_name"]] + index_data["search_terms"]
+            for term in dict.fromkeys(t for t in terms if t):
+                # First occurrence wins, matching the linear scan order
+                self.exact_terms.setdefault(term, condition_id)
+
+                term_id = len(self.terms)
+                grams = trigrams(term)
+                self.terms.append((term, condition_id))
+                self.term_grams.append(len(grams))
+                for gram in grams:
+                    postings[gram].append(term_id)
+
+        self.postings = dict(postings)
+        logger.info(f"Trigram index built: {len(self.terms)} terms, {len(self.postings)} trigrams")
+
+    def candidates(self, query: str) -> List[int]:
+        """Term ids sharing the most trigrams with the query"""
+        query_grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for term_id in self.postings.get(gram, ()):
+                shared[term_id] += 1
+
+        if not shared:
+            return []
+
+        # Rank both by overlap with the query (catches partial matches inside
+        # long terms) and by Dice similarity (catches whole-term typos)
+        by_containment = sorted(shared, key=lambda t: -shared[t])[:self.candidate_limit]
+        by_dice = sorted(
+            shared,
+            key=lambda t: -2 * shared[t] / (len(query_grams) + self.term_grams[t])
+        )[:self.candidate_limit]
+
+        return sorted(set(by_containment) | set(by_dice))
+
+    def best_match(self, query: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Return (best condition, score) for an already normalised query"""
+        condition_id = self.exact_terms.get(query)
+        if condition_id is not None:
+            return self.conditions[condition_id], 100
+
+        best_match = None
+        best_score = 0
+        for term_id in self.candidates(query):
+            term, condition_id = self.terms[term_id]
+            score = score_term(query, term)
+            if score > best_score:
+                best_score = score
+                best_match = self.conditions[condition_id]
+
+        return best_match, best_score
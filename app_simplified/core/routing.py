@@ -0,0 +1,205 @@
+"""
+Overlap and bracketing router
+Compiled from global.overlap_map, chapter policies and overall_directions.route_suppressions
+"""
+
+import logging
+from typing import Dict, Iterable, List, Any, Optional, Set, Tuple
+
+from app_simplified.core.evidence import split_words
+
+logger = logging.getLogger(__name__)
+
+# Routing statuses; only "rated" conditions go on to combination
+RATED = "rated"
+BRACKETED = "bracketed"
+SUPPRESSED = "suppressed"
+OVERLAPPING = "overlapping"
+
+# Evidence signal of the form prior_awards.chapter==<chapter>
+PRIOR_AWARD_SIGNAL = "prior_awards.chapter=="
+
+
+class ConditionRouter:
+    """
+    Routing table keyed by manifestation and chapter
+
+    - Manifestations (overlap_map, named by their key and "terms") are owned
+      by the first chapter in their ownership_priority that the case's other
+      conditions evidence, otherwise by the last chapter listed
+    - Chapters whose policy sets auto_bracket_psychiatric_conditions rate all
+      conditions routed to them, or naming a trigger diagnosis, as one bracket
+      at the highest member rating
+    - route_suppressions drop tagged conditions and tables while a bracket is
+      active in their chapter
+    - Conditions sharing a manifestation in the same chapter are rated once
+    """
+
+    def __init__(self, tod_data: Dict[str, Any]):
+        # term words -> [("manifestation", name) | ("trigger", chapter)]
+        self.terms: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+        self.ownership: Dict[str, List[str]] = {}
+        self.bracket_chapters: Set[str] = set()
+        self.prior_award_triggers: Set[str] = set()
+        # bracket chapter -> suppressed condition tags / table ids
+        self.suppressed_tags: Dict[str, Set[str]] = {}
+        self.suppressed_tables: Dict[str, Set[str]] = {}
+
+        for entry in (tod_data.get("global") or {}).get("overlap_map") or []:
+            manifestation = entry.get("manifestation")
+            priority = [str(chapter) for chapter in entry.get("ownership_priority") or []]
+            if not manifestation or not priority:
+                continue
+            self.ownership[manifestation] = priority
+            # Words naming the manifestation besides its own key
+            terms = entry.get("terms") or []
+            if not terms:
+                logger.warning(f"overlap_map manifestation '{manifestation}' has no terms; "
+                               f"only conditions naming '{manifestation.replace('_', ' ')}' route to it")
+            for term in [manifestation.replace("_", " ")] + list(terms):
+                self._add_term(term, ("manifestation", manifestation))
+
+        for chapter_id, chapter in (tod_data.get("chapters") or {}).items():
+            policy = chapter.get("policy") or {}
+            if not policy.get("auto_bracket_psychiatric_conditions"):
+                continue
+            self.bracket_chapters.add(str(chapter_id))
+            criteria = policy.get("bracket_activation_criteria") or {}
+            for diagnosis in criteria.get("trigger_if_any_entitled_diagnoses") or []:
+                self._add_term(diagnosis, ("trigger", str(chapter_id)))
+            for signal in criteria.get("evidence_signals") or []:
+                if signal.startswith(PRIOR_AWARD_SIGNAL):
+                    self.prior_award_triggers.add(signal[len(PRIOR_AWARD_SIGNAL):].strip())
+
+        for suppression in (tod_data.get("overall_directions") or {}).get("route_suppressions") or []:
+            chapter_id = str(suppression.get("if_bracket_active_in_chapter", ""))
+            self.suppressed_tags.setdefault(chapter_id, set()).update(suppression.get("suppress_tags") or [])
+            # "chapters.20.tables.20.1_emotional_behavioral" -> table id "20.1_emotional_behavioral"
+            self.suppressed_tables.setdefault(chapter_id, set()).update(
+                path.split(".tables.", 1)[-1] for path in suppression.get("suppress_paths") or []
+            )
+
+        self.max_term_words = max(map(len, self.terms), default=0)
+
+    def _add_term(self, term: str, target: Tuple[str, str]):
+        words = tuple(split_words(term))
+        if words and target not in self.terms.get(words, []):
+            self.terms.setdefault(words, []).append(target)
+
+    def _match_terms(self, text: str) -> List[Tuple[str, str]]:
+        """Manifestations and bracket triggers named in a text"""
+        words = split_words(text)
+        found = []
+        for start in range(len(words)):
+            for length in range(1, min(self.max_term_words, len(words) - start) + 1):
+                for target in self.terms.get(tuple(words[start:start + length]), ()):
+                    if target not in found:
+                        found.append(target)
+        return found
+
+    def route(
+        self,
+        assessed: List[Dict[str, Any]],
+        tod_conditions: List[Optional[Dict[str, Any]]],
+        prior_award_chapters: Iterable[str] = ()
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Route a case's assessed conditions
+
+        tod_conditions are the conditions' ToD records and prior_award_chapters
+        the chapters of pre-existing awards. Returns one routing entry per
+        condition (chapter, manifestations, status, bracket) and a summary of
+        each active bracket.
+        """
+        if not self.terms and not self.bracket_chapters:
+            return [
+                {"chapter": c.get("chapter"), "manifestations": [], "status": RATED, "bracket": None}
+                for c in assessed
+            ], []
+
+        # Terms each condition names, and the chapters evidenced without overlap.
+        # A claimed diagnosis with no ToD match (e.g. "PTSD") can still trigger a bracket.
+        matches = []
+        evidenced: Set[str] = set()
+        for condition, tod_condition in zip(assessed, tod_conditions):
+            found = self._match_terms(f"{condition.get('condition', '')} . {(tod_condition or {}).get('name', '')}")
+            if condition.get("tod_found") and not any(kind == "manifestation" for kind, _ in found):
+                evidenced.add(str(condition.get("chapter")))
+            matches.append(found)
+
+        active = {str(c) for c in prior_award_chapters if str(c) in self.prior_award_triggers}
+        owners = {
+            manifestation: next((c for c in priority if c in evidenced), priority[-1])
+            for manifestation, priority in self.ownership.items()
+        }
+
+        routes = []
+        for condition, found in zip(assessed, matches):
+            manifestations = [value for kind, value in found if kind == "manifestation"]
+            triggers = [value for kind, value in found if kind == "trigger"]
+            chapter = str(condition.get("chapter"))
+            if manifestations:
+                chapter = owners[manifestations[0]]
+            if triggers:
+                chapter = triggers[0]
+                active.add(chapter)
+            routes.append({
+                "chapter": chapter,
+                "manifestations": manifestations,
+                "status": RATED,
+                "bracket": None
+            })
+
+        def rank(i: int) -> Tuple[bool, float]:
+            # Conditions rated from the ToD lead their group over unmatched ones
+            return bool(assessed[i].get("tod_found")), assessed[i].get("rating", 0)
+
+        # Brackets, suppressions and overlaps; the highest rating in a group is kept
+        brackets: Dict[str, Dict[str, Any]] = {}
+        leads: Dict[Tuple[str, str], int] = {}
+        for i, (condition, tod_condition, route, found) in enumerate(zip(assessed, tod_conditions, routes, matches)):
+            # Unmatched conditions only take part as bracket triggers
+            if not condition.get("tod_found") and not any(kind == "trigger" for kind, _ in found):
+                continue
+            chapter = route["chapter"]
+            tags = set((tod_condition or {}).get("tags") or [])
+            table_id = (tod_condition or {}).get("table_reference")
+            if chapter not in active and any(
+                tags & self.suppressed_tags.get(c, set()) or table_id in self.suppressed_tables.get(c, set())
+                for c in active if c in self.bracket_chapters
+            ):
+                route["status"] = SUPPRESSED
+                continue
+
+            if chapter in self.bracket_chapters and chapter in active:
+                group = ("bracket", chapter)
+                route["bracket"] = chapter
+                bracket = brackets.setdefault(chapter, {"chapter": chapter, "members": [], "lead": None})
+                bracket["members"].append(condition.get("condition"))
+            elif route["manifestations"]:
+                group = (route["manifestations"][0], chapter)
+            else:
+                continue
+
+            lead = leads.get(group)
+            if lead is None or rank(i) > rank(lead):
+                if lead is not None:
+                    routes[lead]["status"] = BRACKETED if group[0] == "bracket" else OVERLAPPING
+                leads[group] = i
+            else:
+                route["status"] = BRACKETED if group[0] == "bracket" else OVERLAPPING
+
+        for chapter, bracket in brackets.items():
+            lead = leads[("bracket", chapter)]
+            bracket["lead"] = assessed[lead].get("condition")
+            bracket["rating"] = assessed[lead].get("rating", 0)
+
+        return routes, list(brackets.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compiled routing table sizes"""
+        return {
+            "manifestations": len(self.ownership),
+            "bracket_chapters": sorted(self.bracket_chapters),
+            "terms": len(self.terms)
+        }
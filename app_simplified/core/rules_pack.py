@@ -0,0 +1,74 @@
+"""
+Compiled "rules pack" snapshots of the VAC ToD JSON
+Holds the built indexes so processes can skip JSON parsing and index building
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the shape of the indexes stored in a pack changes
+RULES_PACK_FORMAT = 6
+
+PACK_SUFFIX = ".rulespack"
+
+
+def source_digest(raw: bytes) -> str:
+    """SHA-256 of the raw rules JSON bytes"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def default_pack_path(json_path: str) -> Path:
+    """Pack file stored next to the source JSON (master2019ToD.rulespack)"""
+    return Path(json_path).with_suffix(PACK_SUFFIX)
+
+
+def load_rules_pack(pack_path: Path, source_sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a rules pack if it was compiled from the given source hash
+
+    Packs are pickles written by this process family only - never load
+    a pack from an untrusted location.
+    """
+    if not pack_path.exists():
+        return None
+
+    try:
+        with open(pack_path, "rb") as f:
+            pack = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable rules pack {pack_path}: {e}")
+        return None
+
+    if not isinstance(pack, dict) or pack.get("format") != RULES_PACK_FORMAT:
+        logger.info(f"Rules pack {pack_path} has an old format - rebuilding")
+        return None
+
+    if pack.get("source_sha256") != source_sha256:
+        logger.info(f"Rules pack {pack_path} is stale - source JSON changed")
+        return None
+
+    return pack
+
+
+def write_rules_pack(pack_path: Path, pack: Dict[str, Any]) -> bool:
+    """Atomically write a rules pack (temp file + rename)"""
+    tmp_path = pack_path.with_name(f"{pack_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump({**pack, "format": RULES_PACK_FORMAT}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pack_path)
+        logger.info(f"Rules pack written to {pack_path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not write rules pack {pack_path}: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,460 @@
+"""
+Compiled evaluators for VAC ToD rating tables
+Each typed table in the rules JSON is compiled once at load into a lookup structure
+"""
+
+import logging
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whole-percent MI range covered by the dense MI lookup arrays
+MAX_MI = 100
+
+
+def normalize_key(text: Any) -> str:
+    """Case/punctuation-insensitive key for level codes, labels and severities"""
+    return re.sub(r"[^a-z0-9]", "", str(text).lower())
+
+
+def parse_rating(value: Any) -> Tuple[Optional[int], Optional[int], str]:
+    """
+    Split a table rating into (low, high, text)
+
+    Ratings are integers, ranges such as "5-9", minimums such as "60% minimum",
+    or descriptive text ("per clinical") which yields no number.
+    """
+    if value is None:
+        return None, None, ""
+    if isinstance(value, (int, float)):
+        return int(value), int(value), str(value)
+
+    numbers = [int(n) for n in re.findall(r"\d+", str(value))]
+    if not numbers:
+        return None, None, str(value)
+    return numbers[0], numbers[-1], str(value)
+
+
+class TableEvaluator(ABC):
+    """Base for compiled table evaluators; each table type implements evaluate"""
+
+    table_type = ""
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        self.table_id = table_id
+        self.table_number = spec.get("table_number", "")
+        self.title = spec.get("title", table_id)
+
+    def describe(self) -> Dict[str, Any]:
+        """Common identification fields for results"""
+        return {
+            "table_id": self.table_id,
+            "table_number": self.table_number,
+            "title": self.title,
+            "type": self.table_type
+        }
+
+    @abstractmethod
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate the table for a dict of inputs (keys depend on table type)"""
+
+
+class BandTableEvaluator(TableEvaluator):
+    """numeric_band_table - bisect over sorted band minimums"""
+
+    table_type = "numeric_band_table"
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        super().__init__(table_id, spec)
+        self.units = spec.get("units", "")
+        bands = sorted(spec.get("bands", []), key=lambda b: b.get("min") or 0)
+        self.mins = [b.get("min") or 0 for b in bands]
+        self.maxes = [b.get("max") for b in bands]
+        self.bands = []
+        for band in bands:
+            low, high, text = parse_rating(band.get("rating"))
+            self.bands.append({
+                "label": band.get("label", ""),
+                "min": band.get("min"),
+                "max": band.get("max"),
+                "rating": low,
+                "rating_max": high,
+                "rating_text": text
+            })
+
+    def band_index(self, value: float) -> int:
+        """Index of the band containing value, -1 when outside every band"""
+        index = bisect_right(self.mins, value) - 1
+        if index < 0:
+            return -1
+        upper = self.maxes[index]
+        if upper is not None and value > upper:
+            # Values between integer bands (e.g. 149.5) belong to the lower band
+            if index + 1 < len(self.mins) and value < self.mins[index + 1]:
+                return index
+            return -1
+        return index
+
+    def lookup(self, value: float) -> Optional[Dict[str, Any]]:
+        """Band containing value"""
+        index = self.band_index(value)
+        return self.bands[index] if index >= 0 else None
+
+    def band_indices(self, values: np.ndarray) -> np.ndarray:
+        """Vectorised band_index for an array of values (searchsorted over the minimums)"""
+        values = np.asarray(values, dtype=np.float64)
+        indices = np.searchsorted(np.asarray(self.mins, dtype=np.float64), values, side="right") - 1
+        upper = np.asarray([np.inf if m is None else m for m in self.maxes], dtype=np.float64)
+        next_min = np.append(np.asarray(self.mins[1:], dtype=np.float64), np.inf)
+        safe = np.clip(indices, 0, None)
+        outside = (indices < 0) | ((values > upper[safe]) & (values >= next_min[safe]))
+        return np.where(outside, -1, indices)
+
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        value = inputs.get("value")
+        band = self.lookup(float(value)) if value is not None else None
+        return {**self.describe(), "input": value, "units": self.units, "found": band is not None, **(band or {})}
+
+
+class OrdinalLevelsEvaluator(TableEvaluator):
+    """ordinal_levels - dict lookup by level code or label"""
+
+    table_type = "ordinal_levels"
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        super().__init__(table_id, spec)
+        self.levels = []
+        self.by_key = {}
+        for position, level in enumerate(spec.get("levels", [])):
+            low, high, text = parse_rating(level.get("rating"))
+            compiled = {
+                "code": level.get("code", ""),
+                "label": level.get("label", ""),
+                "criteria": level.get("criteria", []),
+                "position": position,
+                "rating": low,
+                "rating_max": high,
+                "rating_text": text
+            }
+            self.levels.append(compiled)
+            # Codes take precedence over labels when they collide
+            self.by_key.setdefault(normalize_key(compiled["label"]), compiled)
+        for compiled in self.levels:
+            self.by_key[normalize_key(compiled["code"])] = compiled
+
+    def lookup(self, level: str) -> Optional[Dict[str, Any]]:
+        """Level by code or label (e.g. 'MODSEV' or 'Moderate-Severe')"""
+        if level is None:
+            return None
+        return self.by_key.get(normalize_key(level))
+
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        level = self.lookup(inputs.get("level"))
+        return {**self.describe(), "input": inputs.get("level"), "found": level is not None, **(level or {})}
+
+
+class RomTableEvaluator(TableEvaluator):
+    """
+    rom_table - per-motion cutpoint arrays, aggregated per the table rule
+
+    Thresholds are packed into a (motions × cutpoints) array at compile time so a
+    whole intake file of visits is classified with array comparisons.
+    """
+
+    table_type = "rom_table"
+
+    # Ordinal position of each cutpoint level; 0 is within normal limits
+    LEVEL_ORDER = {"normal": 0, "mild": 1, "moderate": 2, "severe": 3}
+    LEVEL_NAMES = {order: level for level, order in LEVEL_ORDER.items()}
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        super().__init__(table_id, spec)
+        self.aggregation = spec.get("aggregation", "worst_motion")
+        self.motions = []  # (segment, motion, normal_range, thresholds ascending, levels)
+        self.motion_index = {}
+        self.segments = []
+        for segment in spec.get("segments", []):
+            self.segments.append(segment.get("name", ""))
+            for motion in segment.get("motions", []):
+                cutpoints = sorted(motion.get("cutpoints", []), key=lambda c: c["threshold"])
+                key = (normalize_key(segment.get("name")), normalize_key(motion.get("motion")))
+                self.motion_index[key] = len(self.motions)
+                self.motions.append({
+                    "segment": segment.get("name", ""),
+                    "motion": motion.get("motion", ""),
+                    "normal_range": motion.get("normal_range", []),
+                    "thresholds": [c["threshold"] for c in cutpoints],
+                    "levels": [c["level"] for c in cutpoints],
+                    "weight": float(motion.get("weight", 1))
+                })
+
+        # thresholds[m, k] ascending, padded with +inf; level_orders[m, k] is the level
+        # of an angle at or below thresholds[m, k], and the column past the last real
+        # cutpoint is 0 (normal)
+        width = max((len(m["thresholds"]) for m in self.motions), default=0)
+        self.thresholds = np.full((len(self.motions), width), np.inf)
+        self.level_orders = np.zeros((len(self.motions), width + 1), dtype=np.int8)
+        for i, motion in enumerate(self.motions):
+            count = len(motion["thresholds"])
+            self.thresholds[i, :count] = motion["thresholds"]
+            self.level_orders[i, :count] = [self.LEVEL_ORDER.get(level, 0) for level in motion["levels"]]
+        self.weights = np.asarray([m["weight"] for m in self.motions], dtype=np.float64)
+        self.motion_segments = np.asarray(
+            [self.segments.index(m["segment"]) for m in self.motions], dtype=np.intp
+        )
+
+    def classify(self, segment: str, motion: str, angle: float) -> Optional[str]:
+        """Level for one measured angle (at or below a cutpoint falls in that level)"""
+        index = self.motion_index.get((normalize_key(segment), normalize_key(motion)))
+        if index is None:
+            return None
+        spec = self.motions[index]
+        position = bisect_left(spec["thresholds"], angle)
+        if position >= len(spec["thresholds"]):
+            return "normal"
+        return spec["levels"][position]
+
+    def column_indices(self, columns: List[Tuple[str, str]]) -> np.ndarray:
+        """Motion index for each (segment, motion) column of a batch"""
+        indices = []
+        for segment, motion in columns:
+            index = self.motion_index.get((normalize_key(segment), normalize_key(motion)))
+            if index is None:
+                raise ValueError(f"Unknown motion '{segment} {motion}' for table {self.table_id}")
+            indices.append(index)
+        return np.asarray(indices, dtype=np.intp)
+
+    def classify_batch(self, angles: np.ndarray, motion_indices: np.ndarray) -> np.ndarray:
+        """
+        Vectorised classify for (visits × columns) angles
+
+        Returns level orders shaped like angles, -1 where the angle is NaN (not measured).
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        # bisect_left position = number of cutpoints strictly below the angle
+        positions = (self.thresholds[motion_indices][None, :, :] < angles[:, :, None]).sum(axis=-1)
+        orders = self.level_orders[motion_indices[None, :], positions]
+        return np.where(np.isnan(angles), -1, orders).astype(np.int8)
+
+    def aggregate_batch(self, orders: np.ndarray, motion_indices: np.ndarray) -> np.ndarray:
+        """
+        Apply the table aggregation rule to each visit (-1 when nothing was measured)
+
+        worst_motion takes the most severe motion; average and weighted_sum take the
+        (motion-weighted) mean level, rounded half up.
+        """
+        measured = orders >= 0
+        any_measured = measured.any(axis=1)
+        if self.aggregation == "worst_motion":
+            return orders.max(axis=1, initial=-1).astype(np.int8)
+
+        weights = self.weights[motion_indices] if self.aggregation == "weighted_sum" else np.ones(len(motion_indices))
+        weights = np.where(measured, weights[None, :], 0.0)
+        total = (np.where(measured, orders, 0) * weights).sum(axis=1)
+        weight_sum = weights.sum(axis=1)
+        mean = np.floor(np.divide(total, weight_sum, out=np.zeros_like(total), where=weight_sum > 0) + 0.5)
+        return np.where(any_measured, mean, -1).astype(np.int8)
+
+    def segment_levels_batch(self, orders: np.ndarray, motion_indices: np.ndarray) -> np.ndarray:
+        """Worst level per segment for each visit, shaped (visits × segments), -1 if unmeasured"""
+        segment_orders = np.full((orders.shape[0], len(self.segments)), -1, dtype=np.int8)
+        for segment in range(len(self.segments)):
+            columns = self.motion_segments[motion_indices] == segment
+            if columns.any():
+                segment_orders[:, segment] = orders[:, columns].max(axis=1)
+        return segment_orders
+
+    def evaluate_batch(self, columns: List[Tuple[str, str]], angles: np.ndarray) -> Dict[str, Any]:
+        """
+        Rate many visits in one call
+
+        Args:
+            columns: (segment, motion) for each angle column, e.g. ("Cervical", "Flexion")
+            angles: (visits × columns) measured degrees, NaN where not measured
+
+        Returns:
+            Arrays keyed motion_levels, segment_levels and level, holding level orders
+            (see LEVEL_ORDER; -1 = not measured)
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        if angles.ndim != 2 or angles.shape[1] != len(columns):
+            raise ValueError(f"Angles must be shaped (visits, {len(columns)}), got {angles.shape}")
+
+        motion_indices = self.column_indices(columns)
+        orders = self.classify_batch(angles, motion_indices)
+        return {
+            "motion_levels": orders,
+            "segment_levels": self.segment_levels_batch(orders, motion_indices),
+            "level": self.aggregate_batch(orders, motion_indices)
+        }
+
+    def level_name(self, order: int) -> Optional[str]:
+        """Level name for a level order, None for unmeasured"""
+        return self.LEVEL_NAMES.get(int(order))
+
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Missing (null or NaN) angles are not measured, as in evaluate_batch; non-numeric ones raise ValueError"""
+        measurements = inputs.get("measurements", {})
+        motions = []
+        for segment, segment_motions in measurements.items():
+            for motion, angle in (segment_motions or {}).items():
+                try:
+                    degrees = float(angle) if angle is not None else np.nan
+                except (TypeError, ValueError):
+                    raise ValueError(f"Angle for {segment} {motion} must be a number, got {angle!r}")
+                level = None if np.isnan(degrees) else self.classify(segment, motion, degrees)
+                motions.append({"segment": segment, "motion": motion, "angle": angle, "level": level})
+
+        known = [m for m in motions if m["level"] is not None]
+        level = None
+        if known:
+            motion_indices = self.column_indices([(m["segment"], m["motion"]) for m in known])
+            orders = np.asarray([[self.LEVEL_ORDER.get(m["level"], 0) for m in known]], dtype=np.int8)
+            level = self.level_name(self.aggregate_batch(orders, motion_indices)[0])
+        return {
+            **self.describe(),
+            "aggregation": self.aggregation,
+            "found": bool(known),
+            "motions": motions,
+            "level": level
+        }
+
+
+class MatrixTableEvaluator(TableEvaluator):
+    """matrix_table - row/column index dicts over parsed cell expressions"""
+
+    table_type = "matrix_table"
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        super().__init__(table_id, spec)
+        self.rows = spec.get("rows", [])
+        self.cols = spec.get("cols", [])
+        self.interpolation = spec.get("interpolation", "nearest")
+        self.row_index = {normalize_key(r): i for i, r in enumerate(self.rows)}
+        self.col_index = {normalize_key(c): i for i, c in enumerate(self.cols)}
+        self.cells = [[self.parse_cell(v) for v in row] for row in spec.get("values", [])]
+
+        # Every cell applied to every whole MI 0-100, halves rounded up: mi_values[row, col, mi]
+        cells = np.asarray(self.cells, dtype=np.float64).reshape(len(self.cells), -1, 2)
+        mi = np.arange(MAX_MI + 1, dtype=np.float64)
+        values = np.floor(cells[..., 0:1] * mi + cells[..., 1:2] + 0.5)
+        self.mi_values = np.clip(values, 0, MAX_MI).astype(np.intp)
+
+    @staticmethod
+    def parse_cell(value: Any) -> Tuple[float, float]:
+        """Cell as (MI factor, constant): '=MI' -> (1, 0), '0.75*MI' -> (0.75, 0), '0' -> (0, 0)"""
+        text = str(value).replace(" ", "").lstrip("=")
+        if text.upper() == "MI":
+            return 1.0, 0.0
+        match = re.fullmatch(r"([0-9.]+)\*MI", text, re.IGNORECASE)
+        if match:
+            return float(match.group(1)), 0.0
+        try:
+            return 0.0, float(text)
+        except ValueError:
+            return 0.0, 0.0
+
+    def lookup(self, row: str, col: Optional[str], mi: float) -> Optional[float]:
+        """Cell value for a row/column applied to MI (first column when col is omitted)"""
+        row_i = self.row_index.get(normalize_key(row))
+        col_i = self.col_index.get(normalize_key(col)) if col is not None else 0
+        if row_i is None or col_i is None:
+            return None
+        factor, constant = self.cells[row_i][col_i]
+        return factor * mi + constant
+
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        mi = float(inputs.get("mi", 0))
+        value = self.lookup(inputs.get("row"), inputs.get("col"), mi)
+        return {
+            **self.describe(),
+            "input": {"row": inputs.get("row"), "col": inputs.get("col"), "mi": mi},
+            "found": value is not None,
+            "value": value,
+            # Whole percent, halves rounded up
+            "rating": int(value + 0.5) if value is not None else None
+        }
+
+
+class MIBandTableEvaluator(TableEvaluator):
+    """Table 2.2 mi_bands - bisect on MI band minimums, then level column"""
+
+    table_type = "mi_bands"
+
+    def __init__(self, table_id: str, spec: Dict[str, Any]):
+        super().__init__(table_id, spec)
+        bands = sorted(spec.get("mi_bands", []), key=lambda b: b["mi_min"])
+        self.mins = [b["mi_min"] for b in bands]
+        self.maxes = [b["mi_max"] for b in bands]
+        self.level_codes = sorted({k for b in bands for k in b if k not in ("mi_min", "mi_max")})
+        self.bands = bands
+
+        # Addition for every whole MI 0-100 at each level: additions[level, mi]. A level
+        # the table leaves empty for a band (L3 at MI 1-10) takes the level below it.
+        self.additions = np.zeros((len(self.level_codes), MAX_MI + 1), dtype=np.intp)
+        for band in bands:
+            low = max(int(band["mi_min"]), 0)
+            high = min(int(band["mi_max"]), MAX_MI)
+            value = 0
+            for level, code in enumerate(self.level_codes):
+                value = band[code] if band.get(code) is not None else value
+                self.additions[level, low:high + 1] = value
+
+    def lookup(self, mi: float, level: str) -> Optional[int]:
+        """Addition for an MI value at a QOL level (L1-L3), read from the same additions as PctQolStage"""
+        index = bisect_right(self.mins, mi) - 1
+        code = str(level).upper()
+        if index < 0 or mi > self.maxes[index] or code not in self.level_codes:
+            return None
+        # Every whole MI in a band holds the band's value; read it at the band minimum
+        band_mi = min(max(int(self.mins[index]), 0), MAX_MI)
+        return int(self.additions[self.level_codes.index(code), band_mi])
+
+    def evaluate(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        mi = float(inputs.get("mi", 0))
+        level = inputs.get("level")
+        value = self.lookup(mi, level) if level else None
+        return {**self.describe(), "input": {"mi": mi, "level": level}, "found": value is not None, "rating": value}
+
+
+EVALUATOR_TYPES = {
+    evaluator.table_type: evaluator
+    for evaluator in (BandTableEvaluator, OrdinalLevelsEvaluator, RomTableEvaluator, MatrixTableEvaluator)
+}
+
+
+def compile_table(table_id: str, spec: Dict[str, Any]) -> Optional[TableEvaluator]:
+    """Compile one table spec, None for untyped tables"""
+    spec = spec.get("data", spec)
+    if "mi_bands" in spec:
+        return MIBandTableEvaluator(table_id, spec)
+    evaluator_class = EVALUATOR_TYPES.get(spec.get("type"))
+    return evaluator_class(table_id, spec) if evaluator_class else None
+
+
+def compile_tables(rating_tables: Dict[str, Dict[str, Any]]) -> Dict[str, TableEvaluator]:
+    """
+    Compile every typed rating table
+
+    Evaluators are registered under the rating table key ("9.9.1_hearing_loss")
+    and the chapter table id ("9.1_hearing_loss") used by condition records.
+    """
+    evaluators = {}
+    for key, table in rating_tables.items():
+        table_id = table.get("table_id", key)
+        try:
+            evaluator = compile_table(table_id, table)
+        except Exception as e:
+            logger.warning(f"Could not compile rating table {key}: {e}")
+            continue
+        if evaluator is None:
+            logger.debug(f"Rating table {key} has no typed evaluator")
+            continue
+        evaluators[key] = evaluator
+        evaluators.setdefault(table_id, evaluator)
+    return evaluators
@@ -2,43 +2,148 @@
 VAC Table of Disabilities 2019 data processing and management
 """
 
+import asyncio
 import json
 import logging
+import threading
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union
-from fuzzywuzzy import fuzz, process
 import re
 
+from app_simplified.core.adjustments import PCT_TABLE_ID, QOL_TABLE_ID, PctQolStage
+from app_simplified.core.matching import TrigramMatcher, partial_score
+from app_simplified.core.routing import ConditionRouter
+from app_simplified.core.tables import TableEvaluator, compile_tables
+from app_simplified.core.rules_pack import (
+    default_pack_path, load_rules_pack, source_digest, write_rules_pack
+)
+
 logger = logging.getLogger(__name__)
 
+# Distinct condition names remembered per rules snapshot before the memo is reset
+MATCH_MEMO_SIZE = 4096
+
+# Placeholder base ratings for conditions without a usable ToD table
+SEVERITY_RATINGS = {
+    "minimal": 5,
+    "mild": 10,
+    "moderate": 30,
+    "moderately_severe": 50,
+    "severe": 70,
+    "very_severe": 90,
+    "total": 100
+}
+
 class VACDataManager:
     """
     Manages VAC Table of Disabilities 2019 data
     Provides search, lookup, and indexing functionality
     """
     
-    def __init__(self, json_path: Optional[str] = None):
+    def __init__(
+        self,
+        json_path: Optional[str] = None,
+        matcher: Optional[Any] = None,
+        rules_pack_path: Optional[str] = None
+    ):
         self.json_path = json_path or "app_simplified/data/rules/master2019ToD.json"
+        self.rules_pack_path = Path(rules_pack_path) if rules_pack_path else default_pack_path(self.json_path)
+        self.source_sha256 = ""
+        self.loaded_at = datetime.now().isoformat()
         self.tod_data = {}
         self.conditions_index = {}
         self.chapters_index = {}
         self.rating_tables = {}
         self.search_index = {}
+        self.table_evaluators = {}
+        self.condition_router = ConditionRouter({})
+        self.pct_qol_stage = PctQolStage(None, None)
+        # Any object with build(search_index) and best_match(query) -> (condition, score)
+        self.matcher = matcher or TrigramMatcher()
+        # find_condition results on this snapshot, by (normalised name, threshold)
+        self._match_memo = {}
+        
+        raw = self._read_source()
+        if raw is not None and self._load_rules_pack():
+            return
+        
+        self._load_tod_data(raw)
+        if self._build_indexes():
+            self._write_rules_pack()
+    
+    @property
+    def rules_version(self) -> str:
+        """Version label of the loaded rules: schema version plus short source hash"""
+        schema_version = self.tod_data.get("schema_version", "unknown") if self.tod_data else "unloaded"
+        return f"{schema_version}+{self.source_sha256[:12] or 'nosource'}"
+    
+    def _read_source(self) -> Optional[bytes]:
+        """Read the raw ToD JSON bytes and record their SHA-256"""
+        tod_path = Path(self.json_path)
+        if not tod_path.exists():
+            logger.error(f"VAC ToD data file not found: {tod_path}")
+            return None
+        
+        raw = tod_path.read_bytes()
+        self.source_sha256 = source_digest(raw)
+        return raw
+    
+    def _load_rules_pack(self) -> bool:
+        """Restore data and indexes from a compiled rules pack matching the source hash"""
+        pack = load_rules_pack(self.rules_pack_path, self.source_sha256)
+        if not pack:
+            return False
+        
+        self.tod_data = pack["tod_data"]
+        self.conditions_index = pack["conditions_index"]
+        self.chapters_index = pack["chapters_index"]
+        self.rating_tables = pack["rating_tables"]
+        self.search_index = pack["search_index"]
+        self.table_evaluators = pack["table_evaluators"]
+        self.condition_router = pack["condition_router"]
+        self.pct_qol_stage = pack["pct_qol_stage"]
+        
+        # A pack built with a different matcher strategy only saves the index build
+        if type(pack["matcher"]) is type(self.matcher):
+            self.matcher = pack["matcher"]
+        else:
+            self.matcher.build(self.search_index)
+        
+        logger.info(f"VAC ToD 2019 data loaded from rules pack {self.rules_pack_path} "
+                   f"(schema {pack.get('schema_version')}, sha256 {self.source_sha256[:12]})")
+        return True
+    
+    def _write_rules_pack(self):
+        """Persist the built indexes so the next process can skip JSON parsing"""
+        if not self.tod_data or not self.source_sha256:
+            return
         
-        self._load_tod_data()
-        self._build_indexes()
+        write_rules_pack(self.rules_pack_path, {
+            "source_sha256": self.source_sha256,
+            "schema_version": self.tod_data.get("schema_version"),
+            "tod_data": self.tod_data,
+            "conditions_index": self.conditions_index,
+            "chapters_index": self.chapters_index,
+            "rating_tables": self.rating_tables,
+            "search_index": self.search_index,
+            "table_evaluators": self.table_evaluators,
+            "condition_router": self.condition_router,
+            "pct_qol_stage": self.pct_qol_stage,
+            "matcher": self.matcher
+        })
     
-    def _load_tod_data(self) -> bool:
+    def _load_tod_data(self, raw: Optional[bytes] = None) -> bool:
         """Load VAC ToD 2019 JSON data"""
         try:
             tod_path = Path(self.json_path)
             
-            if not tod_path.exists():
-                logger.error(f"VAC ToD data file not found: {tod_path}")
-                return False
+            if raw is None:
+                raw = self._read_source()
+                if raw is None:
+                    return False
             
-            with open(tod_path, 'r', encoding='utf-8') as f:
-                self.tod_data = json.load(f)
+            self.tod_data = json.loads(raw.decode('utf-8'))
             
             logger.info(f"VAC ToD 2019 data loaded from {tod_path}")
             logger.info(f"Data structure keys: {list(self.tod_data.keys()) if self.tod_data else 'Empty'}")
@@ -52,11 +157,11 @@ class VACDataManager:
             logger.error(f"Error loading VAC ToD data: {e}")
             return False
     
-    def _build_indexes(self):
+    def _build_indexes(self) -> bool:
         """Build search indexes for fast lookup"""
         if not self.tod_data:
             logger.warning("No VAC ToD data to index")
-            return
+            return False
         
         try:
             # Index chapters
@@ -81,7 +186,8 @@ class VACDataManager:
                     "symptoms": condition_info.get("symptoms", []),
                     "rating_criteria": condition_info.get("rating_criteria", {}),
                     "assessment_notes": condition_info.get("assessment_notes", ""),
-                    "keywords": condition_info.get("keywords", [])
+                    "keywords": condition_info.get("keywords", []),
+                    "table_reference": condition_info.get("table_reference", "")
                 }
             
             # Index rating tables
@@ -89,15 +195,29 @@ class VACDataManager:
             for table_id, table_info in rating_tables_data.items():
                 self.rating_tables[table_id] = table_info
             
+            # Compile typed tables into evaluators
+            self.table_evaluators = compile_tables(self.rating_tables)
+            
+            # Compile overlap ownership, bracketing policies and suppressions
+            self.condition_router = ConditionRouter(self.tod_data)
+            
+            # Table 3.1 and Table 2.2 as the dense arrays the PCT/QOL stage indexes
+            self.pct_qol_stage = PctQolStage(
+                self.table_evaluators.get(PCT_TABLE_ID), self.table_evaluators.get(QOL_TABLE_ID)
+            )
+            
             # Build search index for fuzzy matching
             self._build_search_index()
             
             logger.info(f"Built indexes: {len(self.chapters_index)} chapters, "
                        f"{len(self.conditions_index)} conditions, "
-                       f"{len(self.rating_tables)} rating tables")
+                       f"{len(self.rating_tables)} rating tables, "
+                       f"{len(set(map(id, self.table_evaluators.values())))} compiled table evaluators")
+            return True
             
         except Exception as e:
             logger.error(f"Error building VAC ToD indexes: {e}")
+            return False
     
     def _build_search_index(self):
         """Build full-text search index"""
@@ -123,6 +243,8 @@ class VACDataManager:
                 "search_terms": cleaned_terms,
                 "primary_name": condition["name"].lower()
             }
+        
+        self.matcher.build(self.search_index)
     
     def find_condition(self, condition_name: str, threshold: int = 70) -> Optional[Dict[str, Any]]:
         """
@@ -139,42 +261,22 @@ class VACDataManager:
             return None
         
         condition_name = condition_name.lower().strip()
-        best_match = None
-        best_score = 0
-        
-        for condition_id, index_data in self.search_index.items():
-            # Check primary name first
-            primary_score = fuzz.ratio(condition_name, index_data["primary_name"])
-            if primary_score > best_score:
-                best_score = primary_score
-                best_match = index_data["condition"]
-            
-            # Check all search terms
-            for term in index_data["search_terms"]:
-                if not term:
-                    continue
-                    
-                # Exact match gets priority
-                if condition_name == term:
-                    return index_data["condition"]
-                
-                # Partial ratio for partial matches
-                score = max(
-                    fuzz.ratio(condition_name, term),
-                    fuzz.partial_ratio(condition_name, term),
-                    fuzz.token_sort_ratio(condition_name, term)
-                )
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = index_data["condition"]
+        memo_key = (condition_name, threshold)
+        if memo_key in self._match_memo:
+            return self._match_memo[memo_key]
+        
+        best_match, best_score = self.matcher.best_match(condition_name)
         
         if best_score >= threshold:
             logger.info(f"Found condition match: '{condition_name}' -> '{best_match['name']}' (score: {best_score})")
-            return best_match
+        else:
+            logger.warning(f"No condition match found for '{condition_name}' (best score: {best_score})")
+            best_match = None
         
-        logger.warning(f"No condition match found for '{condition_name}' (best score: {best_score})")
-        return None
+        if len(self._match_memo) >= MATCH_MEMO_SIZE:
+            self._match_memo.clear()
+        self._match_memo[memo_key] = best_match
+        return best_match
     
     def get_condition_by_id(self, condition_id: str) -> Optional[Dict[str, Any]]:
         """Get condition by exact ID"""
@@ -218,13 +320,13 @@ class VACDataManager:
                 continue
             
             # Calculate relevance score
-            name_score = fuzz.partial_ratio(query_lower, condition.get("name", "").lower())
-            desc_score = fuzz.partial_ratio(query_lower, condition.get("description", "").lower())
+            name_score = partial_score(query_lower, condition.get("name", "").lower())
+            desc_score = partial_score(query_lower, condition.get("description", "").lower())
             
             # Check symptoms
             symptom_scores = []
             for symptom in condition.get("symptoms", []):
-                symptom_scores.append(fuzz.partial_ratio(query_lower, symptom.lower()))
+                symptom_scores.append(partial_score(query_lower, symptom.lower()))
             
             max_symptom_score = max(symptom_scores) if symptom_scores else 0
             
@@ -255,6 +357,10 @@ class VACDataManager:
         """Get rating table by ID"""
         return self.rating_tables.get(table_id)
     
+    def get_table_evaluator(self, table_id: str) -> Optional[TableEvaluator]:
+        """Compiled evaluator by rating table key or chapter table id"""
+        return self.table_evaluators.get(table_id)
+    
     def get_condition_rating_info(self, condition_id: str) -> Optional[Dict[str, Any]]:
         """Get rating information for a specific condition"""
         condition = self.get_condition_by_id(condition_id)
@@ -280,14 +386,20 @@ class VACDataManager:
         self, 
         condition_name: str, 
         severity: str, 
-        symptoms: List[str]
+        symptoms: List[str],
+        tod_condition: Optional[Dict[str, Any]] = None,
+        table_value: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
         Calculate basic disability rating for a condition
         Note: This is a simplified implementation for testing
         Real VAC calculations are much more complex
+        
+        Pass tod_condition when the condition was already matched to skip
+        a second fuzzy lookup. table_value is a level code or, for band
+        tables, a numeric measurement (e.g. DSHL points).
         """
-        condition = self.find_condition(condition_name)
+        condition = tod_condition or self.find_condition(condition_name)
         
         if not condition:
             return {
@@ -297,18 +409,26 @@ class VACDataManager:
                 "rationale": f"Condition '{condition_name}' not found in VAC ToD 2019"
             }
         
-        # Simple severity-based rating (placeholder logic)
-        severity_ratings = {
-            "minimal": 5,
-            "mild": 10,
-            "moderate": 30,
-            "moderately_severe": 50,
-            "severe": 70,
-            "very_severe": 90,
-            "total": 100
-        }
+        # Rate from the condition's own ToD table when the severity names a table level
+        table_rating = self._rate_from_table(condition, severity, table_value)
+        if table_rating:
+            return {
+                "condition": condition["name"],
+                "condition_id": condition["id"],
+                "chapter": condition.get("chapter", ""),
+                "found": True,
+                "rating": min(table_rating["rating"], 100),
+                "base_rating": table_rating["rating"],
+                "symptom_adjustment": 0,
+                "rationale": f"Table {table_rating['table_number'] or table_rating['table_id']} "
+                            f"'{table_rating['label']}': {table_rating['rating_text']}%",
+                "symptoms_considered": symptoms,
+                "tod_criteria": condition.get("rating_criteria", {}),
+                "table_evaluation": table_rating
+            }
         
-        base_rating = severity_ratings.get(severity.lower(), 20)
+        # Simple severity-based rating (placeholder logic)
+        base_rating = SEVERITY_RATINGS.get(severity.lower(), 20)
         
         # Adjust for number of symptoms (simplified)
         symptom_adjustment = min(len(symptoms) * 2, 20)
@@ -328,12 +448,79 @@ class VACDataManager:
             "tod_criteria": condition.get("rating_criteria", {})
         }
     
-    def get_stats(self) -> Dict[str, int]:
+    def _rate_from_table(
+        self,
+        condition: Dict[str, Any],
+        severity: str,
+        table_value: Optional[Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Evaluate the condition's compiled table
+        
+        Ordinal tables are looked up by table_value or severity as a level
+        code/label, band tables by a numeric table_value. Returns None when
+        the table gives no numeric rating so the caller can fall back.
+        """
+        evaluator = self.get_table_evaluator(condition.get("table_reference", ""))
+        if evaluator is None:
+            return None
+        
+        if evaluator.table_type == "ordinal_levels":
+            result = evaluator.evaluate({"level": table_value if table_value is not None else severity})
+        elif evaluator.table_type == "numeric_band_table" and table_value is not None:
+            result = evaluator.evaluate({"value": table_value})
+        else:
+            return None
+        
+        if not result.get("found") or result.get("rating") is None:
+            return None
+        return result
+    
+    def get_rating_levels(self, condition: Dict[str, Any], symptoms: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Every rating a condition can take, lowest table position first
+        
+        Ordinal tables give their levels, band tables their bands; otherwise the
+        placeholder severity ladder (with the same symptom adjustment as
+        calculate_basic_rating) is used. Levels without a numeric rating are skipped.
+        """
+        evaluator = self.get_table_evaluator(condition.get("table_reference", ""))
+        if evaluator is not None and evaluator.table_type == "ordinal_levels":
+            levels = [
+                {"level": level["code"], "label": level["label"], "rating": level["rating"], "source": "table"}
+                for level in evaluator.levels
+            ]
+        elif evaluator is not None and evaluator.table_type == "numeric_band_table":
+            levels = [
+                {"level": band["label"], "label": band["label"], "rating": band["rating"], "source": "table"}
+                for band in evaluator.bands
+            ]
+        else:
+            levels = []
+        
+        levels = [level for level in levels if level["rating"] is not None]
+        if levels:
+            return levels
+        
+        symptom_adjustment = min(len(symptoms or []) * 2, 20)
+        return [
+            {
+                "level": severity,
+                "label": severity.replace("_", " ").capitalize(),
+                "rating": min(rating + symptom_adjustment, 100),
+                "source": "severity"
+            }
+            for severity, rating in SEVERITY_RATINGS.items()
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
         """Get statistics about loaded VAC ToD data"""
         return {
             "total_chapters": len(self.chapters_index),
             "total_conditions": len(self.conditions_index),
             "total_rating_tables": len(self.rating_tables),
+            "compiled_tables": len(set(map(id, self.table_evaluators.values()))),
+            "routing": self.condition_router.get_stats(),
             "search_index_size": len(self.search_index)
         }
     
@@ -372,5 +559,109 @@ class VACDataManager:
         
         return validation
 
+class VACRulesRegistry:
+    """
+    Holds the active VACDataManager and swaps in reloaded ToD rules atomically
+    
+    Each VACDataManager is built completely before it is published, and is never
+    mutated afterwards, so callers that take snapshot() once see consistent
+    indexes for the whole request. Attribute access is forwarded to the active
+    manager so the registry can be used wherever a VACDataManager is expected.
+    """
+    
+    def __init__(self, json_path: Optional[str] = None, rules_pack_path: Optional[str] = None):
+        self.json_path = json_path or "app_simplified/data/rules/master2019ToD.json"
+        self.rules_pack_path = rules_pack_path
+        self.generation = 1
+        self._active = VACDataManager(self.json_path, rules_pack_path=rules_pack_path)
+        self._source_mtime = self._get_source_mtime()
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+    
+    def __getattr__(self, name: str) -> Any:
+        active = self.__dict__.get("_active")
+        if active is None:
+            raise AttributeError(name)
+        return getattr(active, name)
+    
+    def snapshot(self) -> VACDataManager:
+        """Current rules; hold on to it for the duration of one assessment"""
+        return self._active
+    
+    def add_reload_listener(self, callback):
+        """Register callback(new_manager) to run after each successful swap"""
+        self._listeners.append(callback)
+    
+    def get_version_info(self) -> Dict[str, Any]:
+        """Version details for the active rules (used by /health)"""
+        active = self._active
+        return {
+            "rules_version": active.rules_version,
+            "generation": self.generation,
+            "source_sha256": active.source_sha256,
+            "loaded_at": active.loaded_at
+        }
+    
+    def _get_source_mtime(self) -> Optional[int]:
+        try:
+            return Path(self.json_path).stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def source_changed(self) -> bool:
+        """Whether the rules JSON was modified since the active rules were loaded"""
+        return self._get_source_mtime() != self._source_mtime
+    
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Build a complete new index set and swap it in
+        
+        Blocking - call via reload_async from the event loop. The current rules
+        stay active if the new file is missing, invalid or unchanged.
+        """
+        with self._reload_lock:
+            previous = self._active
+            # Record the mtime first so the watcher only retries a bad file after the next edit
+            self._source_mtime = self._get_source_mtime()
+            
+            fresh = VACDataManager(self.json_path, rules_pack_path=self.rules_pack_path)
+            validation = fresh.validate_data()
+            if not validation["valid"]:
+                logger.error(f"VAC ToD reload rejected, keeping {previous.rules_version}: {validation['errors']}")
+                return {"reloaded": False, "errors": validation["errors"], **self.get_version_info()}
+            
+            if fresh.source_sha256 == previous.source_sha256 and not force:
+                return {"reloaded": False, "errors": [], **self.get_version_info()}
+            
+            # Single reference assignment - readers see either the old or the new rules
+            self._active = fresh
+            self.generation += 1
+        
+        logger.info(f"VAC ToD rules reloaded: {previous.rules_version} -> {fresh.rules_version} "
+                   f"(generation {self.generation})")
+        
+        for callback in self._listeners:
+            try:
+                callback(fresh)
+            except Exception as e:
+                logger.error(f"Rules reload listener failed: {e}")
+        
+        return {"reloaded": True, "errors": [], **self.get_version_info()}
+    
+    async def reload_async(self, force: bool = False) -> Dict[str, Any]:
+        """Reload off the event loop so in-flight requests keep being served"""
+        return await asyncio.to_thread(self.reload, force)
+    
+    async def watch_source(self, interval: float):
+        """Poll the rules JSON modification time and reload when it changes"""
+        logger.info(f"Watching {self.json_path} for rule changes every {interval}s")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.source_changed():
+                    await self.reload_async()
+            except Exception as e:
+                logger.error(f"VAC ToD rules watcher error: {e}")
+
 # Global instance for application use
-vac_data_manager = VACDataManager()
+vac_data_manager = VACRulesRegistry()
@@ -1,13 +1,24 @@
 """
 Document processing and search module for VAC assessments
+
+Exports are imported on first access, so importing a submodule (such as
+extraction, in spawned extraction workers) does not build the shared
+processor and search instances.
 """
 
-from .processor import DocumentProcessor, document_processor
-from .search import DocumentSearch, document_search
+import importlib
+
+_EXPORTS = {
+    "DocumentProcessor": ".processor",
+    "document_processor": ".processor",
+    "DocumentSearch": ".search",
+    "document_search": ".search"
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "DocumentProcessor",
-    "document_processor", 
-    "DocumentSearch",
-    "document_search"
-]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,178 @@
+"""
+Text extraction for uploaded PDF and Word documents
+Runs PyPDF2 and python-docx in a process pool; large PDFs are split into page ranges
+"""
+
+import asyncio
+import logging
+import math
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import PyPDF2
+from docx import Document as DocxDocument
+
+logger = logging.getLogger(__name__)
+
+# Most PDF pages one worker task extracts; each task reopens the PDF, so ranges stay coarse
+PDF_PAGES_PER_TASK = 25
+
+# Seconds one document may spend in extraction
+DEFAULT_EXTRACTION_TIMEOUT = 300.0
+
+# Section header extract_pdf puts before each page's text
+PAGE_HEADER = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+
+
+@contextmanager
+def mapped_file(path: str) -> Iterator[Union[mmap.mmap, BinaryIO]]:
+    """
+    Read-only memory map of a file, or the open file where it cannot be mapped
+
+    Readers given the map page the file in from the OS cache instead of
+    copying it into the process, and workers on the same file share the pages.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and some filesystems cannot be mapped
+            yield f
+            return
+        with mapped:
+            yield mapped
+
+
+def read_text(path: str) -> str:
+    """A text file decoded as UTF-8, ignoring undecodable bytes"""
+    with mapped_file(path) as data:
+        if isinstance(data, mmap.mmap):
+            return str(data, "utf-8", errors="ignore")
+        return data.read().decode("utf-8", errors="ignore")
+
+
+def count_pdf_pages(path: str) -> int:
+    """Page count of a PDF (worker entry point)"""
+    with mapped_file(path) as data:
+        return len(PyPDF2.PdfReader(data).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """(page number, text) for pages [start, stop) of a PDF (worker entry point)"""
+    pages = []
+    with mapped_file(path) as data:
+        reader = PyPDF2.PdfReader(data)
+        for page_num in range(start, min(stop, len(reader.pages))):
+            try:
+                pages.append((page_num + 1, reader.pages[page_num].extract_text() or ""))
+            except Exception as e:
+                logger.warning(f"Could not extract text from page {page_num + 1}: {e}")
+    return pages
+
+
+def extract_docx_text(path: str) -> str:
+    """Paragraph and table text of a Word document (worker entry point)"""
+    # A .docx is a zip archive: zipfile seeks to and reads only the parts it needs
+    doc = DocxDocument(path)
+
+    text_content = []
+
+    # Extract paragraph text
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            text_content.append(paragraph.text)
+
+    # Extract table text
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = [cell.text for cell in row.cells if cell.text.strip()]
+            if row_text:
+                text_content.append(" | ".join(row_text))
+
+    return "\n\n".join(text_content)
+
+
+def page_offsets(text: str) -> List[Tuple[int, int]]:
+    """(page number, character offset of its section) for each page header in extracted PDF text"""
+    return [(int(match.group(1)), match.start()) for match in PAGE_HEADER.finditer(text)]
+
+
+def page_ranges(page_count: int, workers: int, pages_per_task: int = PDF_PAGES_PER_TASK) -> List[Tuple[int, int]]:
+    """Split pages into [start, stop) ranges: one per worker, capped at pages_per_task"""
+    if page_count <= 0:
+        return []
+    size = max(1, min(pages_per_task, math.ceil(page_count / max(1, workers))))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class TextExtractor:
+    """
+    Process pool for document text extraction
+
+    A PDF is split into page ranges that workers extract in parallel; the
+    pages are reassembled in order. Each document has one timeout covering
+    all of its phases; pending ranges of a timed-out document are cancelled.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = DEFAULT_EXTRACTION_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        # spawn, not fork: the API process already runs threads
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _run_until(self, path: Path, deadline: float, *calls) -> list:
+        """Run (function, *args) calls on the pool, giving up at deadline (event loop time)"""
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(self.pool, func, *args) for func, *args in calls]
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            # Only calls still waiting for a worker are cancelled: a range already
+            # running (e.g. a hung PyPDF2 parse) keeps its pool process busy until it returns
+            for future in futures:
+                future.cancel()
+            raise ValueError(f"Text extraction of {path.name} timed out after {self.timeout:g}s")
+
+    async def extract_pdf(self, path: Union[str, Path]) -> str:
+        """Text of every page with text, as '--- Page N ---' sections in page order"""
+        path = Path(path)
+        # Counting pages and extracting the ranges share the document's timeout
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        try:
+            (page_count,) = await self._run_until(path, deadline, (count_pdf_pages, str(path)))
+            ranges = page_ranges(page_count, self.workers)
+            chunks = await self._run_until(
+                path, deadline, *((extract_pdf_pages, str(path), start, stop) for start, stop in ranges)
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"PDF text extraction error: {e}")
+            raise ValueError(f"Could not extract text from PDF: {str(e)}")
+
+        return "\n\n".join(
+            f"--- Page {page_num} ---\n{page_text}"
+            for chunk in chunks for page_num, page_text in chunk if page_text.strip()
+        )
+
+    async def extract_docx(self, path: Union[str, Path]) -> str:
+        """Paragraph and table text of a Word document"""
+        path = Path(path)
+        try:
+            deadline = asyncio.get_running_loop().time() + self.timeout
+            (text,) = await self._run_until(path, deadline, (extract_docx_text, str(path)))
+            return text
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"DOCX text extraction error: {e}")
+            raise ValueError(f"Could not extract text from Word document: {str(e)}")
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
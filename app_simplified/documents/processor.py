@@ -3,29 +3,85 @@ Document processing for VAC assessments
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from pathlib import Path
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
+import hashlib
+import json
+import os
 import uuid
 
 from fastapi import UploadFile
-import PyPDF2
-from docx import Document as DocxDocument
+
+from app_simplified.documents.extraction import TextExtractor, page_offsets, read_text
 
 logger = logging.getLogger(__name__)
 
+# Uploads extracted and analysed at the same time by the ingestion queue
+DEFAULT_INGESTION_WORKERS = 2
+
+# Bytes read from an upload and written to disk at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Upload file info persisted to the manifest (status and extraction are rebuilt from sidecars)
+MANIFEST_FIELDS = (
+    "file_id", "filename", "file_type", "file_size", "file_path", "sha256", "deduplicated",
+    "case_id", "user_id", "uploaded_at"
+)
+
+# Extraction results kept per blob and file type, in memory and in its sidecar
+EXTRACTION_FIELDS = ("extracted_text", "text_length", "page_offsets", "medical_analysis")
+
 class DocumentProcessor:
     """
     Processes uploaded documents for VAC assessments
     Handles PDF, DOCX, and text files
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        extractor: Optional[TextExtractor] = None,
+        max_file_size: Optional[int] = None,
+        allowed_file_types: Optional[List[str]] = None
+    ):
         self.processed_files = {}  # In-memory storage for demo
         self.case_files = {}  # Maps case_id to list of file_ids
         self.upload_dir = Path("data/uploads")
         self.upload_dir.mkdir(exist_ok=True)
+        # Content-addressed upload store: sha256 -> blob (path, size, file_ids, extractions by file type)
+        self.blob_dir = self.upload_dir / "blobs"
+        self.blobs: Dict[str, Dict[str, Any]] = {}
+        # One extraction per blob and file type at a time; duplicates wait and reuse it.
+        # key -> [lock, holder and waiter count]; the entry goes when the count reaches 0
+        self.blob_locks: Dict[str, List[Any]] = {}
+        # Uploads waiting for extraction; created by start_ingestion on the running loop
+        self.ingestion_queue: Optional[asyncio.Queue] = None
+        self.ingestion_tasks: List[asyncio.Task] = []
+        # PDF/DOCX extraction process pool; created on first use when not given
+        self.extractor = extractor
+        # Upload limits (None allows any size / any extension)
+        self.max_file_size = max_file_size
+        self.allowed_file_types = [ext.lower() for ext in allowed_file_types] if allowed_file_types else None
+        # Append-only JSON lines of stored and deleted uploads; replayed by load_manifest at startup
+        self.manifest_path = self.upload_dir / "manifest.jsonl"
+        self.manifest_loaded = False
+        self.rehydrated_queue: List[str] = []
+    
+    def configure(
+        self,
+        extractor: Optional[TextExtractor] = None,
+        max_file_size: Optional[int] = None,
+        allowed_file_types: Optional[List[str]] = None
+    ):
+        """Set the extraction pool and upload limits of a processor created at import"""
+        if extractor is not None:
+            if self.extractor is not None:
+                self.extractor.shutdown()
+            self.extractor = extractor
+        self.max_file_size = max_file_size
+        self.allowed_file_types = [ext.lower() for ext in allowed_file_types] if allowed_file_types else None
     
     async def process_file(
         self,
@@ -44,150 +100,394 @@ class DocumentProcessor:
         Returns:
             Processing result with extracted content
         """
+        filename = file.filename or "upload"
         try:
-            file_id = str(uuid.uuid4())
-            filename = file.filename or f"upload_{file_id}"
-            
-            # Read file content
-            content = await file.read()
-            
-            # Save file to disk for persistence
-            file_path = self.upload_dir / f"{file_id}_{filename}"
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            # Reset file pointer for potential re-reading
-            await file.seek(0)
-            
-            # Determine file type and extract text
-            file_extension = Path(filename).suffix.lower()
-            
-            if file_extension == ".pdf":
-                extracted_text = await self._extract_pdf_text(content)
-                file_type = "PDF"
-            elif file_extension in [".docx", ".doc"]:
-                extracted_text = await self._extract_docx_text(content)
-                file_type = "Word Document"
-            elif file_extension == ".txt":
-                extracted_text = content.decode('utf-8', errors='ignore')
-                file_type = "Text Document"
-            elif file_extension == ".json":
-                extracted_text = content.decode('utf-8', errors='ignore')
-                file_type = "JSON Document"
-            else:
-                # Try to decode as text
-                try:
-                    extracted_text = content.decode('utf-8', errors='ignore')
-                    file_type = "Text Document"
-                except:
-                    raise ValueError(f"Unsupported file type: {file_extension}")
-            
-            # Analyze content for medical conditions
-            medical_analysis = await self._analyze_medical_content(extracted_text)
-            
-            # Store processed file info
-            file_info = {
-                "file_id": file_id,
-                "filename": filename,
-                "file_type": file_type,
-                "file_size": len(content),
-                "file_path": str(file_path),
-                "extracted_text": extracted_text,
-                "text_length": len(extracted_text),
-                "medical_analysis": medical_analysis,
-                "case_id": case_id,
-                "user_id": user_id,
-                "processed_at": datetime.now().isoformat(),
-                "status": "processed"
-            }
+            file_info = await self._store_upload(file, case_id, user_id)
+            filename = file_info["filename"]
+            await self._process_stored_file(file_info["file_id"])
             
-            self.processed_files[file_id] = file_info
-            
-            # Associate with case if provided
-            if case_id:
-                if case_id not in self.case_files:
-                    self.case_files[case_id] = []
-                self.case_files[case_id].append(file_id)
-            
-            logger.info(f"Successfully processed file: {filename} ({file_type})")
+            if file_info["status"] == "failed":
+                raise ValueError(file_info["error"])
             
             return {
-                "file_id": file_id,
+                "file_id": file_info["file_id"],
                 "filename": filename,
-                "file_type": file_type,
+                "file_type": file_info["file_type"],
                 "status": "processed",
-                "text_length": len(extracted_text),
-                "conditions_detected": medical_analysis.get("conditions_detected", []),
+                "text_length": file_info["text_length"],
+                "conditions_detected": file_info["medical_analysis"].get("conditions_detected", []),
                 "processing_time": "immediate"
             }
             
         except Exception as e:
             logger.error(f"File processing error for {filename}: {e}")
-            
-            # Store error info
-            error_file_info = {
-                "file_id": str(uuid.uuid4()),
-                "filename": filename,
-                "status": "failed",
-                "error": str(e),
-                "processed_at": datetime.now().isoformat()
-            }
-            
             return {
                 "filename": filename,
                 "status": "failed",
                 "error": str(e)
             }
     
-    async def _extract_pdf_text(self, content: bytes) -> str:
-        """Extract text from PDF content"""
+    async def enqueue_file(
+        self,
+        file: UploadFile,
+        case_id: Optional[str] = None,
+        user_id: str = "anonymous"
+    ) -> Dict[str, Any]:
+        """
+        Store an upload and queue it for extraction and analysis
+        
+        Returns as soon as the file is on disk; poll get_file_status for progress.
+        A file whose bytes were already extracted as the same type is
+        processed at once from the stored blob instead of being queued.
+        Raises ValueError when the upload breaks the type or size limits.
+        """
+        if self.ingestion_queue is None:
+            self.start_ingestion()
+        
+        file_info = await self._store_upload(file, case_id, user_id)
+        if not await self._reuse_extraction(file_info):
+            await self.ingestion_queue.put(file_info["file_id"])
+        
+        return {
+            "file_id": file_info["file_id"],
+            "filename": file_info["filename"],
+            "file_type": file_info["file_type"],
+            "file_size": file_info["file_size"],
+            "sha256": file_info["sha256"],
+            "deduplicated": file_info["deduplicated"],
+            "status": file_info["status"]
+        }
+    
+    async def _store_upload(
+        self,
+        file: UploadFile,
+        case_id: Optional[str],
+        user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Stream an upload into the blob store and register it as queued
+        
+        The file is copied in UPLOAD_CHUNK_SIZE chunks and hashed on the way,
+        so memory use does not grow with its size. It is kept as
+        blobs/<sha256[:2]>/<sha256>; when that blob exists the copy is dropped.
+        Raises ValueError, leaving nothing on disk, when its type is not
+        allowed or it exceeds max_file_size.
+        """
+        file_id = str(uuid.uuid4())
+        filename = file.filename or f"upload_{file_id}"
+        
+        extension = Path(filename).suffix.lower()
+        if self.allowed_file_types is not None and extension not in self.allowed_file_types:
+            raise ValueError(
+                f"File type '{extension or filename}' is not allowed (allowed: {', '.join(self.allowed_file_types)})"
+            )
+        if self.max_file_size is not None and file.size is not None and file.size > self.max_file_size:
+            raise ValueError(f"{filename} is {file.size} bytes; the limit is {self.max_file_size} bytes")
+        
+        part_path = self.upload_dir / f".{file_id}.part"
+        sha256 = hashlib.sha256()
+        file_size = 0
         try:
-            import io
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            
-            text_content = []
-            for page_num, page in enumerate(pdf_reader.pages):
+            with open(part_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if self.max_file_size is not None and file_size > self.max_file_size:
+                        raise ValueError(f"{filename} exceeds the {self.max_file_size} byte upload limit")
+                    sha256.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            digest = sha256.hexdigest()
+            blob_path = self.blob_dir / digest[:2] / digest
+            deduplicated = blob_path.exists()
+            if deduplicated:
+                part_path.unlink()
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(part_path, blob_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        
+        file_info = {
+            "file_id": file_id,
+            "filename": filename,
+            "file_type": self._get_file_type(filename),
+            "file_size": file_size,
+            "file_path": str(blob_path),
+            "sha256": digest,
+            "deduplicated": deduplicated,
+            "case_id": case_id,
+            "user_id": user_id,
+            "uploaded_at": datetime.now().isoformat(),
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0
+        }
+        self._register_file(file_info)
+        await self._append_manifest({key: file_info[key] for key in MANIFEST_FIELDS})
+        
+        return file_info
+    
+    def _register_file(self, file_info: Dict[str, Any]):
+        """Index an upload by file_id, by blob and by case"""
+        self.processed_files[file_info["file_id"]] = file_info
+        
+        blob = self.blobs.setdefault(file_info["sha256"], {
+            "sha256": file_info["sha256"],
+            "path": file_info["file_path"],
+            "size": file_info["file_size"],
+            "file_ids": [],
+            "extractions": {}
+        })
+        blob["file_ids"].append(file_info["file_id"])
+        
+        # Associate with case if provided
+        case_id = file_info.get("case_id")
+        if case_id:
+            if case_id not in self.case_files:
+                self.case_files[case_id] = []
+            self.case_files[case_id].append(file_info["file_id"])
+    
+    async def _append_manifest(self, record: Dict[str, Any]):
+        """Append one record to the upload manifest"""
+        def append():
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        
+        await asyncio.to_thread(append)
+    
+    def load_manifest(self):
+        """
+        Rebuild processed_files, case_files and blobs from the manifest
+        
+        Called once by the application at startup, never on import. Only the
+        manifest is read: uploads whose sidecar exists are marked processed
+        and their extraction is read from it on first access; the rest are
+        queued again when ingestion starts.
+        """
+        if self.manifest_loaded:
+            return
+        self.manifest_loaded = True
+        if not self.manifest_path.exists():
+            return
+        
+        records: Dict[str, Dict[str, Any]] = {}
+        compact = False
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
                 try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                except Exception as e:
-                    logger.warning(f"Could not extract text from page {page_num + 1}: {e}")
-            
-            return "\n\n".join(text_content)
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-write
+                    logger.warning(f"Skipping unreadable manifest line {line_number}")
+                    compact = True
+                    continue
+                if record.get("deleted"):
+                    records.pop(record.get("file_id"), None)
+                    compact = True
+                else:
+                    records[record["file_id"]] = record
+        
+        for file_id, record in list(records.items()):
+            if not Path(record["file_path"]).exists():
+                logger.warning(f"Dropping manifest entry {file_id}: {record['file_path']} is missing")
+                del records[file_id]
+                compact = True
+                continue
             
+            processed = self._sidecar_path(record["sha256"], record["file_type"]).exists()
+            self._register_file({
+                **record,
+                "status": "processed" if processed else "queued",
+                "stage": "done" if processed else "queued",
+                "progress": 1.0 if processed else 0.0
+            })
+            if not processed:
+                self.rehydrated_queue.append(file_id)
+        
+        if compact:
+            # Rewrite without deleted and unreadable entries
+            temp_path = self.manifest_path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for record in records.values():
+                    f.write(json.dumps(record) + "\n")
+            os.replace(temp_path, self.manifest_path)
+        
+        logger.info(
+            f"Rehydrated {len(records)} uploads for {len(self.case_files)} cases from {self.manifest_path} "
+            f"({len(self.rehydrated_queue)} to extract)"
+        )
+    
+    def _sidecar_path(self, sha256: str, file_type: str) -> Path:
+        """Sidecar holding a blob's extraction as one file type"""
+        return self.blob_dir / sha256[:2] / f"{sha256}.{file_type.lower().replace(' ', '_')}.json"
+    
+    def _read_sidecar(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Extraction stored in a sidecar, or None when there is none or it is unreadable"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {key: data[key] for key in EXTRACTION_FIELDS}
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            logger.error(f"PDF text extraction error: {e}")
-            raise ValueError(f"Could not extract text from PDF: {str(e)}")
+            logger.warning(f"Ignoring unreadable sidecar {path}: {e}")
+            return None
+    
+    def _write_sidecar(self, path: Path, data: Dict[str, Any]):
+        """Write a sidecar atomically"""
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
     
-    async def _extract_docx_text(self, content: bytes) -> str:
-        """Extract text from DOCX content"""
+    @asynccontextmanager
+    async def _blob_lock(self, key: str) -> AsyncIterator[None]:
+        """Hold the extraction lock for a blob and file type"""
+        entry = self.blob_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
         try:
-            import io
-            doc = DocxDocument(io.BytesIO(content))
-            
-            text_content = []
-            
-            # Extract paragraph text
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            # Extract table text
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text)
-                    if row_text:
-                        text_content.append(" | ".join(row_text))
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.blob_locks[key]
+    
+    async def _reuse_extraction(self, file_info: Dict[str, Any]) -> bool:
+        """
+        Mark an upload processed from its blob's extraction for the same file type, if there is one
+        
+        The extraction is read from the blob's sidecar when it is not in memory yet.
+        """
+        blob = self.blobs.get(file_info.get("sha256"))
+        if blob is None:
+            return False
+        extraction = blob["extractions"].get(file_info["file_type"])
+        if extraction is None:
+            sidecar = self._sidecar_path(blob["sha256"], file_info["file_type"])
+            extraction = await asyncio.to_thread(self._read_sidecar, sidecar)
+            if extraction is None:
+                return False
+            blob["extractions"][file_info["file_type"]] = extraction
+        
+        file_info.update({
+            **extraction,
+            "processed_at": file_info.get("processed_at") or datetime.now().isoformat(),
+            "status": "processed",
+            "stage": "done",
+            "progress": 1.0
+        })
+        logger.info(f"Reused extraction of blob {file_info['sha256'][:12]} for {file_info['filename']}")
+        return True
+    
+    async def _process_stored_file(self, file_id: str):
+        """Extract and analyse a stored upload, recording each stage on its file info"""
+        file_info = self.processed_files[file_id]
+        file_info.update({"status": "processing", "stage": "extracting", "progress": 0.1,
+                          "started_at": datetime.now().isoformat()})
+        try:
+            sha256 = file_info.get("sha256")
+            async with self._blob_lock(f"{sha256}:{file_info['file_type']}"):
+                # A duplicate queued while the first copy was being extracted
+                if await self._reuse_extraction(file_info):
+                    return
+                
+                extracted_text = await self._extract_text(Path(file_info["file_path"]), file_info["filename"])
+                
+                file_info.update({"stage": "analyzing", "progress": 0.8})
+                medical_analysis = await self._analyze_medical_content(extracted_text)
+                
+                extraction = {
+                    "extracted_text": extracted_text,
+                    "text_length": len(extracted_text),
+                    "page_offsets": page_offsets(extracted_text),
+                    "medical_analysis": medical_analysis
+                }
+                if sha256 in self.blobs:
+                    self.blobs[sha256]["extractions"][file_info["file_type"]] = extraction
+                    try:
+                        await asyncio.to_thread(
+                            self._write_sidecar,
+                            self._sidecar_path(sha256, file_info["file_type"]),
+                            {"sha256": sha256, "file_type": file_info["file_type"],
+                             "processed_at": datetime.now().isoformat(), **extraction}
+                        )
+                    except Exception as e:
+                        logger.warning(f"Could not write extraction sidecar for {file_info['filename']}: {e}")
             
-            return "\n\n".join(text_content)
+            file_info.update({
+                **extraction,
+                "processed_at": datetime.now().isoformat(),
+                "status": "processed",
+                "stage": "done",
+                "progress": 1.0
+            })
+            logger.info(f"Successfully processed file: {file_info['filename']} ({file_info['file_type']})")
             
         except Exception as e:
-            logger.error(f"DOCX text extraction error: {e}")
-            raise ValueError(f"Could not extract text from Word document: {str(e)}")
+            logger.error(f"File processing error for {file_info['filename']}: {e}")
+            file_info.update({
+                "processed_at": datetime.now().isoformat(),
+                "status": "failed",
+                "stage": "failed",
+                "error": str(e)
+            })
+    
+    def start_ingestion(self, workers: int = DEFAULT_INGESTION_WORKERS):
+        """Start the ingestion workers on the running event loop"""
+        if self.ingestion_queue is not None:
+            return
+        self.ingestion_queue = asyncio.Queue()
+        self.ingestion_tasks = [
+            asyncio.create_task(self._ingestion_worker(), name=f"document-ingestion-{i}")
+            for i in range(max(1, workers))
+        ]
+        # Uploads from the manifest that were never extracted
+        for file_id in self.rehydrated_queue:
+            self.ingestion_queue.put_nowait(file_id)
+        self.rehydrated_queue = []
+        logger.info(f"Document ingestion started with {len(self.ingestion_tasks)} workers")
+    
+    async def stop_ingestion(self):
+        """Cancel the ingestion workers; files still queued stay queued"""
+        for task in self.ingestion_tasks:
+            task.cancel()
+        await asyncio.gather(*self.ingestion_tasks, return_exceptions=True)
+        self.ingestion_tasks = []
+        self.ingestion_queue = None
+        if self.extractor is not None:
+            self.extractor.shutdown()
+            self.extractor = None
+    
+    async def _ingestion_worker(self):
+        """Process queued uploads one at a time"""
+        while True:
+            file_id = await self.ingestion_queue.get()
+            try:
+                if file_id in self.processed_files:
+                    await self._process_stored_file(file_id)
+            except Exception as e:
+                logger.error(f"Ingestion worker error for {file_id}: {e}")
+            finally:
+                self.ingestion_queue.task_done()
+    
+    async def get_file_status(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Ingestion status and progress of an upload"""
+        file_info = await self.get_file_content(file_id)
+        if not file_info:
+            return None
+        
+        status = {
+            key: file_info.get(key)
+            for key in (
+                "file_id", "filename", "file_type", "file_size", "case_id", "status", "stage",
+                "progress", "uploaded_at", "started_at", "processed_at", "error"
+            )
+        }
+        if file_info.get("status") == "processed":
+            status["text_length"] = file_info.get("text_length", 0)
+            status["conditions_detected"] = file_info.get("medical_analysis", {}).get("conditions_detected", [])
+        return status
     
     async def _analyze_medical_content(self, text: str) -> Dict[str, Any]:
         """
@@ -267,7 +567,7 @@ class DocumentProcessor:
                         "filename": file_info["filename"],
                         "file_type": file_info["file_type"],
                         "status": file_info["status"],
-                        "processed_at": file_info["processed_at"],
+                        "processed_at": file_info.get("processed_at"),
                         "text_length": file_info.get("text_length", 0),
                         "conditions_detected": file_info.get("medical_analysis", {}).get("conditions_detected", []),
                         "document_type": file_info.get("medical_analysis", {}).get("document_type", "unknown")
@@ -283,27 +583,31 @@ class DocumentProcessor:
         """Get full file content including extracted text"""
         file_info = self.processed_files.get(file_id)
         if file_info:
+            # Rehydrated from the manifest: read the extraction from its sidecar once
+            if file_info.get("status") == "processed" and "extracted_text" not in file_info:
+                if not await self._reuse_extraction(file_info):
+                    file_info.update({"status": "queued", "stage": "queued", "progress": 0.0})
+                    if self.ingestion_queue is not None:
+                        await self.ingestion_queue.put(file_id)
+                    else:
+                        self.rehydrated_queue.append(file_id)
             return file_info
         
         # Check if file exists on disk
         for file_path in self.upload_dir.glob(f"{file_id}_*"):
             if file_path.exists():
-                # Re-extract content from disk
-                with open(file_path, "rb") as f:
-                    content = f.read()
-                
                 filename = file_path.name.replace(f"{file_id}_", "")
                 file_type = self._get_file_type(filename)
                 
-                # Re-extract text
-                extracted_text = await self._extract_text_from_content(content, filename)
+                # Re-extract text from disk
+                extracted_text = await self._extract_text(file_path, filename)
                 medical_analysis = await self._analyze_medical_content(extracted_text)
                 
                 file_info = {
                     "file_id": file_id,
                     "filename": filename,
                     "file_type": file_type,
-                    "file_size": len(content),
+                    "file_size": file_path.stat().st_size,
                     "file_path": str(file_path),
                     "extracted_text": extracted_text,
                     "text_length": len(extracted_text),
@@ -332,23 +636,19 @@ class DocumentProcessor:
         else:
             return "Unknown"
     
-    async def _extract_text_from_content(self, content: bytes, filename: str) -> str:
-        """Extract text from file content"""
+    async def _extract_text(self, file_path: Path, filename: str) -> str:
+        """Extract text from a stored file; PDF and Word documents go to the extraction pool"""
         file_extension = Path(filename).suffix.lower()
         
-        if file_extension == ".pdf":
-            return await self._extract_pdf_text(content)
-        elif file_extension in [".docx", ".doc"]:
-            return await self._extract_docx_text(content)
-        elif file_extension == ".txt":
-            return content.decode('utf-8', errors='ignore')
-        elif file_extension == ".json":
-            return content.decode('utf-8', errors='ignore')
-        else:
-            try:
-                return content.decode('utf-8', errors='ignore')
-            except:
-                return "Unable to extract text from file"
+        if file_extension in (".pdf", ".docx", ".doc"):
+            if self.extractor is None:
+                self.extractor = TextExtractor()
+            if file_extension == ".pdf":
+                return await self.extractor.extract_pdf(file_path)
+            return await self.extractor.extract_docx(file_path)
+        
+        # Text, JSON and anything else is read as UTF-8
+        return await asyncio.to_thread(read_text, str(file_path))
     
     async def delete_file(self, file_id: str) -> bool:
         """Delete a processed file"""
@@ -356,8 +656,20 @@ class DocumentProcessor:
             if file_id in self.processed_files:
                 file_info = self.processed_files[file_id]
                 file_path = file_info.get("file_path")
+                blob = self.blobs.get(file_info.get("sha256"))
+                if blob is not None:
+                    # The blob is shared; remove it with its last upload
+                    if file_id in blob["file_ids"]:
+                        blob["file_ids"].remove(file_id)
+                    if blob["file_ids"]:
+                        file_path = None
+                    else:
+                        del self.blobs[blob["sha256"]]
+                        for sidecar in self.blob_dir.glob(f"{blob['sha256'][:2]}/{blob['sha256']}.*.json"):
+                            sidecar.unlink()
                 if file_path and Path(file_path).exists():
                     Path(file_path).unlink()
+                await self._append_manifest({"file_id": file_id, "deleted": True})
                 
                 # Remove from case associations
                 for case_id, file_list in self.case_files.items():
@@ -384,12 +696,13 @@ class DocumentProcessor:
         """Get processing statistics"""
         total_files = len(self.processed_files)
         
-        # Count files on disk
-        disk_files = list(self.upload_dir.glob("*"))
-        total_disk_files = len(disk_files)
+        # Count files on disk (uploads stored before the blob store, plus blobs)
+        disk_files = [path for path in self.upload_dir.glob("*") if path.is_file()]
+        total_disk_files = len(disk_files) + len(self.blobs)
         
         successful = len([f for f in self.processed_files.values() if f.get("status") == "processed"])
-        failed = total_files - successful
+        failed = len([f for f in self.processed_files.values() if f.get("status") == "failed"])
+        pending = total_files - successful - failed
         
         file_types = {}
         for file_info in self.processed_files.values():
@@ -401,8 +714,13 @@ class DocumentProcessor:
             "total_disk_files": total_disk_files,
             "successful": successful,
             "failed": failed,
+            "pending": pending,
+            "queue_depth": self.ingestion_queue.qsize() if self.ingestion_queue else 0,
             "file_types": file_types,
-            "cases_with_files": len(self.case_files)
+            "cases_with_files": len(self.case_files),
+            "blobs": len(self.blobs),
+            "blob_bytes": sum(blob["size"] for blob in self.blobs.values()),
+            "deduplicated_uploads": sum(len(blob["file_ids"]) - 1 for blob in self.blobs.values() if blob["file_ids"])
         }
 
 # Global instance for application use
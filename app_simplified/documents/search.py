@@ -107,10 +107,12 @@ class DocumentSearch:
             query_lower = query.lower()
             
             # Search through processed files
-            for file_id, file_info in self.doc_processor.processed_files.items():
+            for file_id, file_info in list(self.doc_processor.processed_files.items()):
                 if file_info.get("status") != "processed":
                     continue
                 
+                # Uploads rehydrated at startup load their text on first access
+                file_info = await self.doc_processor.get_file_content(file_id) or file_info
                 extracted_text = file_info.get("extracted_text", "")
                 if not extracted_text:
                     continue
@@ -3,28 +3,52 @@ VAC Canada ToD 2019 Assessment API
 Focused exclusively on VAC disability rating assessments
 """
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
-from typing import List, Dict, Any
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
+import json
 import logging
 
 from app_simplified.core.config import get_settings
 from app_simplified.core.auth import verify_token
+from app_simplified.core.case_history import CaseHistoryStore
+from app_simplified.core.result_cache import ResultCache
+from app_simplified.core.vac_data import vac_data_manager
 from app_simplified.chat.routes import chat_router
-from app_simplified.rating.vac_canada import VACRatingEngine
-from app_simplified.documents.processor import DocumentProcessor
-from app_simplified.documents.search import DocumentSearch
-from app_simplified.schemas.intake import CasePayload, ChatRequest
+from app_simplified.rating.vac_canada import VACRatingEngine, create_assessment_executor
+from app_simplified.documents.extraction import TextExtractor
+from app_simplified.documents.processor import document_processor
+from app_simplified.documents.search import document_search
+from app_simplified.schemas.intake import (
+    CasePayload, ChatRequest, DSHLBatchRequest, DSHLRequest, ROMBatchRequest, VACRatingBatchRequest,
+    VACSensitivityRequest
+)
 from app_simplified.schemas.results import AssessmentResult, ChatResponse
 
 # Initialize settings
 settings = get_settings()
 
 # Initialize services
-vac_rating_engine = VACRatingEngine()
-document_processor = DocumentProcessor()
-document_search = DocumentSearch()
+vac_rating_engine = VACRatingEngine(
+    result_cache=ResultCache(settings.result_cache_size, settings.result_cache_ttl),
+    assessment_memo=ResultCache(settings.assessment_memo_size, settings.assessment_memo_ttl),
+    executor=create_assessment_executor(settings.assessment_executor, settings.assessment_workers),
+    max_concurrency=settings.assessment_concurrency,
+    case_history=(
+        CaseHistoryStore(settings.case_history_path, settings.case_history_batch_size)
+        if settings.case_history_path else None
+    )
+)
+# One shared processor: uploads made here are the ones document search sees
+document_processor.configure(
+    extractor=TextExtractor(settings.extraction_workers, settings.extraction_timeout),
+    max_file_size=settings.max_file_size,
+    allowed_file_types=settings.allowed_file_types_list
+)
 
 app = FastAPI(
     title="VAC ToD 2019 Assessment API",
@@ -46,6 +70,43 @@ security = HTTPBearer()
 # Include routers
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
 
+@app.on_event("startup")
+async def start_rules_watcher():
+    """Start polling the ToD rules file when hot reload is enabled"""
+    if settings.rules_watch_interval > 0:
+        app.state.rules_watcher = asyncio.create_task(
+            vac_data_manager.watch_source(settings.rules_watch_interval)
+        )
+
+@app.on_event("startup")
+async def start_document_ingestion():
+    """Rebuild uploads from the manifest, then start the workers that extract and analyse them"""
+    document_processor.load_manifest()
+    document_processor.start_ingestion(settings.ingestion_workers)
+
+@app.on_event("shutdown")
+async def stop_document_ingestion():
+    """Stop the document ingestion workers and the extraction pool"""
+    await document_processor.stop_ingestion()
+
+@app.on_event("shutdown")
+async def stop_rules_watcher():
+    """Stop the ToD rules watcher"""
+    watcher = getattr(app.state, "rules_watcher", None)
+    if watcher:
+        watcher.cancel()
+
+@app.on_event("shutdown")
+async def stop_assessment_executor():
+    """Shut down the per-condition assessment pool"""
+    vac_rating_engine.executor.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def close_case_history():
+    """Write queued assessments and close the case history store"""
+    if vac_rating_engine.case_history:
+        await asyncio.to_thread(vac_rating_engine.case_history.close)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -53,9 +114,29 @@ async def health_check():
         "status": "healthy",
         "service": "VAC ToD 2019 Assessment API",
         "version": "1.0.0",
-        "environment": settings.environment
+        "environment": settings.environment,
+        "rules": vac_data_manager.get_version_info(),
+        "result_cache": vac_rating_engine.result_cache.get_stats(),
+        "case_history": vac_rating_engine.case_history.get_stats() if vac_rating_engine.case_history else None
     }
 
+@app.post("/admin/rules/reload", tags=["admin"])
+async def reload_vac_rules(
+    force: bool = False,
+    token: Dict = Depends(verify_token)
+):
+    """
+    Reload VAC ToD rules from disk without restarting the API
+    
+    The new indexes are built in a worker thread and swapped in atomically;
+    assessments already running finish on the rules they started with.
+    """
+    try:
+        return await vac_data_manager.reload_async(force=force)
+    except Exception as e:
+        logging.error(f"Rules reload error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/upload", tags=["documents"])
 async def upload_files(
     files: List[UploadFile] = File(...),
@@ -63,30 +144,56 @@ async def upload_files(
     token: Dict = Depends(verify_token)
 ):
     """
-    Upload and process VAC assessment documents
+    Upload VAC assessment documents for processing
     Supports: PDF medical reports, Word documents, previous assessments
+    
+    Files are streamed to disk and queued; extraction and analysis run in
+    the background. Poll /files/{file_id}/status for progress. Files with
+    the same content as an earlier upload reuse its stored copy and are
+    returned already processed. Files over
+    MAX_FILE_SIZE or not in ALLOWED_FILE_TYPES are rejected individually;
+    the request fails with 422 only when every file is rejected.
     """
     try:
         results = []
         for file in files:
-            # Process file immediately
-            result = await document_processor.process_file(
-                file=file,
-                case_id=case_id,
-                user_id=token.get("sub", "anonymous")
-            )
+            try:
+                result = await document_processor.enqueue_file(
+                    file=file,
+                    case_id=case_id,
+                    user_id=token.get("sub", "anonymous")
+                )
+            except ValueError as e:
+                result = {"filename": file.filename, "status": "rejected", "error": str(e)}
             results.append(result)
         
+        accepted = sum(1 for result in results if result["status"] != "rejected")
+        if not accepted:
+            raise HTTPException(status_code=422, detail=[result["error"] for result in results])
+        
         return {
-            "status": "processed",
+            "status": "queued",
             "files": results,
-            "message": f"Processed {len(files)} VAC assessment documents successfully"
+            "message": f"Queued {accepted} VAC assessment documents for processing"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"File upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/files/{file_id}/status", tags=["documents"])
+async def get_file_status(
+    file_id: str,
+    token: Dict = Depends(verify_token)
+):
+    """Ingestion status of an uploaded document (queued, processing, processed or failed)"""
+    status = await document_processor.get_file_status(file_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+    return status
+
 @app.post("/assess", response_model=AssessmentResult, tags=["assessment"])
 async def assess_vac_case(
     payload: CasePayload,
@@ -105,22 +212,138 @@ async def assess_vac_case(
     try:
         result = await vac_rating_engine.assess_case(payload)
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logging.error(f"VAC assessment error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator is still reading the request body
+    
+    The stock response watches receive() for a disconnect, which would swallow
+    the rest of the upload; here request.stream() raising ClientDisconnect
+    inside the iterator ends the response instead.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+# Longest NDJSON record accepted by /assess/stream
+STREAM_MAX_LINE_BYTES = 1024 * 1024
+
+async def ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without buffering more than one record
+    
+    A line longer than STREAM_MAX_LINE_BYTES is skipped up to its newline
+    and yielded as None, so the caller can report it and keep going.
+    """
+    buffer = bytearray()
+    discarding = False
+    async for chunk in chunks:
+        start = 0
+        newline = chunk.find(b"\n")
+        while newline != -1:
+            if discarding or len(buffer) + newline - start > STREAM_MAX_LINE_BYTES:
+                yield None
+            else:
+                buffer += chunk[start:newline]
+                yield bytes(buffer)
+            buffer.clear()
+            discarding = False
+            start = newline + 1
+            newline = chunk.find(b"\n", start)
+        if not discarding:
+            buffer += chunk[start:]
+            if len(buffer) > STREAM_MAX_LINE_BYTES:
+                buffer.clear()
+                discarding = True
+    if discarding:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+@app.post("/assess/stream", tags=["assessment"])
+async def assess_vac_cases_stream(
+    request: Request,
+    token: Dict = Depends(verify_token)
+):
+    """
+    Assess an NDJSON stream of VACCasePayload records
+    
+    Records are parsed as they arrive and assessed with at most
+    ASSESSMENT_STREAM_CONCURRENCY in flight, so memory stays flat however
+    large the upload. Each result is written as an NDJSON line as soon as it
+    is ready, tagged with its input line number; a bad or over-long line
+    yields an error line and the stream continues.
+    """
+    async def assess_line(line_number: int, line: bytes) -> Dict[str, Any]:
+        try:
+            payload = CasePayload.model_validate_json(line)
+            result = await vac_rating_engine.assess_case(payload)
+            return {
+                "line": line_number,
+                "case_id": payload.case_id,
+                "result": AssessmentResult.model_validate(result).model_dump(mode="json")
+            }
+        except ValidationError as e:
+            return {"line": line_number, "error": f"Invalid case payload: {e.errors(include_url=False)}"}
+        except ValueError as e:
+            return {"line": line_number, "error": str(e)}
+        except Exception as e:
+            logging.error(f"Streaming assessment error on line {line_number}: {e}")
+            return {"line": line_number, "error": str(e)}
+    
+    async def result_lines():
+        pending = set()
+        try:
+            line_number = 0
+            async for line in ndjson_lines(request.stream()):
+                line_number += 1
+                if line is None:
+                    yield json.dumps({
+                        "line": line_number,
+                        "error": f"NDJSON record longer than {STREAM_MAX_LINE_BYTES} bytes"
+                    }) + "\n"
+                    continue
+                if not line.strip():
+                    continue
+                pending.add(asyncio.create_task(assess_line(line_number, line)))
+                if len(pending) >= settings.assessment_stream_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    done = {task for task in pending if task.done()}
+                    pending -= done
+                for task in done:
+                    yield json.dumps(task.result(), default=str) + "\n"
+            
+            for task in asyncio.as_completed(pending):
+                yield json.dumps(await task, default=str) + "\n"
+        finally:
+            # Client went away: stop assessments still in flight
+            for task in pending:
+                task.cancel()
+    
+    return DuplexStreamingResponse(result_lines(), media_type="application/x-ndjson")
+
 @app.post("/calculate", tags=["rating"])
 async def calculate_disability_rating(
     conditions: List[Dict[str, Any]],
     pre_existing: List[Dict[str, Any]] = None,
+    qol_level: Optional[str] = Body(None),
     token: Dict = Depends(verify_token)
 ):
     """
     Calculate VAC disability rating for specific conditions
     
     Args:
-        conditions: List of conditions with severity ratings
+        conditions: List of conditions with severity ratings; a condition may
+            carry a Table 3.1 "contribution" band (e.g. "About 1/2") for PCT
         pre_existing: Optional pre-existing conditions for PCT calculations
+        qol_level: Optional Table 2.2 QOL level (L1-L3)
     
     Returns:
         Final disability rating with breakdown
@@ -128,7 +351,8 @@ async def calculate_disability_rating(
     try:
         rating_data = {
             "conditions": conditions,
-            "pre_existing": pre_existing or []
+            "pre_existing": pre_existing or [],
+            "qol_level": qol_level
         }
         
         result = await vac_rating_engine.calculate_rating(rating_data)
@@ -137,13 +361,151 @@ async def calculate_disability_rating(
             "individual_conditions": result["conditions"],
             "calculation_method": result["method"],
             "pct_applied": result.get("pct_applied", False),
+            "calculation_details": result.get("calculation_details", {}),
+            "brackets": result.get("brackets", []),
             "quality_of_life_impact": result.get("qol_impact")
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logging.error(f"Rating calculation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/calculate/sensitivity", tags=["rating"])
+async def calculate_rating_sensitivity(
+    request: VACSensitivityRequest,
+    token: Dict = Depends(verify_token)
+):
+    """
+    What-if totals for re-rating conditions at each of their ToD levels
+    
+    Returns, for every varied condition, the total at each of its levels with
+    the other conditions unchanged, plus the full grid when cartesian is set.
+    """
+    try:
+        return await vac_rating_engine.calculate_sensitivity(request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logging.error(f"Sensitivity calculation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Cases rated per engine call when streaming /calculate/batch results
+BATCH_CHUNK_SIZE = 500
+
+@app.post("/calculate/batch", tags=["rating"])
+async def calculate_disability_ratings_batch(
+    request: VACRatingBatchRequest,
+    token: Dict = Depends(verify_token)
+):
+    """
+    Calculate VAC disability ratings for many cases in one call
+    
+    Results are streamed back as NDJSON, one line per case in input order,
+    so large nightly re-rating runs start receiving output immediately.
+    """
+    cases = [case.model_dump() for case in request.cases]
+    
+    async def result_lines():
+        for start in range(0, len(cases), BATCH_CHUNK_SIZE):
+            chunk = cases[start:start + BATCH_CHUNK_SIZE]
+            try:
+                results = await vac_rating_engine.calculate_ratings_batch(chunk)
+            except Exception as e:
+                logging.error(f"Batch rating calculation error: {e}")
+                results = [{"case_id": case.get("case_id"), "error": str(e)} for case in chunk]
+            
+            for offset, result in enumerate(results):
+                line = {"index": start + offset, "case_id": result.get("case_id")}
+                if "error" in result:
+                    line["error"] = result["error"]
+                else:
+                    line.update({
+                        "total_disability_rating": result["total_rating"],
+                        "individual_conditions": result["conditions"],
+                        "calculation_method": result["method"],
+                        "pct_applied": result["pct_applied"],
+                        "qol_addition": result["qol_addition"],
+                        "brackets": result["brackets"]
+                    })
+                yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.post("/tables/{table_id}/evaluate", tags=["rating"])
+async def evaluate_rating_table(
+    table_id: str,
+    inputs: Dict[str, Any],
+    token: Dict = Depends(verify_token)
+):
+    """
+    Evaluate a VAC ToD rating table (bands, ordinal levels, ROM, matrix, Table 2.2)
+    
+    Args:
+        table_id: Table key, e.g. 9.1_hearing_loss or 21.1_psychiatric
+        inputs: Table inputs, e.g. {"value": 240} or {"level": "MOD"}
+    """
+    try:
+        return await vac_rating_engine.evaluate_table(table_id, inputs)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logging.error(f"Table evaluation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/hearing/dshl", tags=["rating"])
+async def calculate_hearing_dshl(
+    request: DSHLRequest,
+    token: Dict = Depends(verify_token)
+):
+    """Derived Summed Hearing Loss and Table 9.1 band for one audiogram"""
+    try:
+        return await vac_rating_engine.calculate_dshl(request.audiogram, request.entitled_ears)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logging.error(f"DSHL calculation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/hearing/dshl/batch", tags=["rating"])
+async def calculate_hearing_dshl_batch(
+    request: DSHLBatchRequest,
+    token: Dict = Depends(verify_token)
+):
+    """Derived Summed Hearing Loss for many audiograms in one vectorised call"""
+    try:
+        results = await vac_rating_engine.calculate_dshl_batch(request.audiograms, request.entitled)
+        return {"results": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logging.error(f"DSHL batch calculation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/msk/rom/batch", tags=["rating"])
+async def evaluate_rom_batch(
+    request: ROMBatchRequest,
+    token: Dict = Depends(verify_token)
+):
+    """Chapter 17 ROM levels for many visits, classified in one vectorised call"""
+    if request.visit_ids is not None and len(request.visit_ids) != len(request.angles):
+        raise HTTPException(status_code=422, detail="visit_ids must have one entry per angles row")
+    try:
+        results = await vac_rating_engine.evaluate_rom_batch(
+            request.columns, request.angles, request.visit_ids, request.table_id
+        )
+        return {"results": results, "count": len(results)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logging.error(f"ROM batch evaluation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/search", tags=["documents"])
 async def search_vac_documents(
     query: str,
@@ -252,16 +614,26 @@ async def get_case_files(
 @app.get("/cases/{case_id}/history", tags=["cases"])
 async def get_case_assessment_history(
     case_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_results: bool = False,
     token: Dict = Depends(verify_token)
 ):
-    """Get assessment history for a specific case"""
+    """
+    Get assessment history for a specific case, newest first
+    
+    Pass next_cursor from a response as cursor to fetch the following page.
+    """
     try:
-        history = await vac_rating_engine.get_case_history(case_id)
+        history = await vac_rating_engine.get_case_history(case_id, limit, cursor, include_results)
         return {
             "case_id": case_id,
-            "assessments": history,
-            "count": len(history)
+            "assessments": history["assessments"],
+            "count": len(history["assessments"]),
+            "next_cursor": history["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logging.error(f"Case history lookup error: {e}")
         raise HTTPException(status_code=404, detail="Case history not found")
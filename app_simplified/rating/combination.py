@@ -0,0 +1,134 @@
+"""
+VAC combined-values engine
+Precomputed 0–100 × 0–100 combined-values table folded highest rating first
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+MAX_RATING = 100
+
+
+def build_combined_values_table() -> np.ndarray:
+    """
+    Combined value of every rating pair, A + B - (A × B / 100)
+
+    Computed in integers as (100A + 100B - AB) / 100, rounded half up, so each
+    combination step is exact and reproducible.
+    """
+    a = np.arange(MAX_RATING + 1, dtype=np.int32)[:, None]
+    b = np.arange(MAX_RATING + 1, dtype=np.int32)[None, :]
+    return ((100 * a + 100 * b - a * b + 50) // 100).astype(np.uint8)
+
+
+# Built once at import (application startup), ~10 KB
+COMBINED_VALUES = build_combined_values_table()
+
+
+def normalize_ratings(ratings: Sequence[float]) -> List[int]:
+    """Whole-percent ratings clipped to 0–100, highest first"""
+    return sorted((min(max(int(round(r)), 0), MAX_RATING) for r in ratings), reverse=True)
+
+
+def combine_ratings(
+    ratings: Sequence[float],
+    cap: int = MAX_RATING
+) -> Tuple[int, List[int], List[Tuple[int, int, int]]]:
+    """
+    Combine one case's ratings through the combined-values table
+
+    Returns (total, ratings in combination order, lookups) where each lookup
+    is (combined so far, next rating, table value).
+    """
+    ordered = normalize_ratings(ratings)
+    if not ordered:
+        return 0, ordered, []
+
+    combined = ordered[0]
+    lookups = []
+    for rating in ordered[1:]:
+        value = int(COMBINED_VALUES[combined, rating])
+        lookups.append((combined, rating, value))
+        combined = value
+
+    return min(combined, cap), ordered, lookups
+
+
+def pad_ratings(ratings: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Pack ragged per-case ratings into an (cases × max_conditions) array
+
+    Missing slots are 0, which is the identity of the combination formula.
+    """
+    width = max((len(r) for r in ratings), default=0)
+    padded = np.zeros((len(ratings), max(width, 1)), dtype=np.float64)
+    for row, case_ratings in enumerate(ratings):
+        if len(case_ratings):
+            padded[row, :len(case_ratings)] = case_ratings
+    return np.clip(np.rint(padded), 0, MAX_RATING).astype(np.intp)
+
+
+def combine_ratings_batch(ratings: Sequence[Sequence[float]], cap: int = MAX_RATING) -> np.ndarray:
+    """
+    Combined rating for every case in one pass
+
+    Each row is sorted highest first, as the combined-values method requires,
+    then folded column by column with one table gather per column.
+    """
+    if not len(ratings):
+        return np.zeros(0, dtype=np.int64)
+
+    padded = -np.sort(-pad_ratings(ratings), axis=1)
+
+    combined = padded[:, 0]
+    for col in range(1, padded.shape[1]):
+        combined = COMBINED_VALUES[combined, padded[:, col]].astype(np.intp)
+
+    return np.minimum(combined, cap).astype(np.int64)
+
+
+def prefix_folds(ordered: Sequence[int]) -> np.ndarray:
+    """
+    Combined value after each prefix of ratings sorted highest first
+
+    folds[0] is 0 (the identity, COMBINED_VALUES[0, x] == x) and folds[i] is
+    the combination of the first i ratings.
+    """
+    folds = np.zeros(len(ordered) + 1, dtype=np.intp)
+    for i, rating in enumerate(ordered):
+        folds[i + 1] = COMBINED_VALUES[folds[i], rating]
+    return folds
+
+
+def combine_with_each(others: Sequence[float], candidates: Sequence[float]) -> np.ndarray:
+    """
+    Combined value of a fixed set of ratings plus each candidate rating in turn
+
+    The fold of the fixed ratings above a candidate is shared (prefix_folds),
+    so only the ratings below it are folded again, for all candidates at once.
+    """
+    ordered = np.asarray(normalize_ratings(others), dtype=np.intp)
+    candidates = np.clip(np.rint(np.asarray(candidates, dtype=np.float64)), 0, MAX_RATING).astype(np.intp)
+    folds = prefix_folds(ordered)
+
+    # Each candidate is combined after every fixed rating at least as high as it
+    positions = np.searchsorted(-ordered, -candidates, side="right")
+    combined = COMBINED_VALUES[folds[positions], candidates].astype(np.intp)
+    for j, rating in enumerate(ordered):
+        combined = np.where(positions <= j, COMBINED_VALUES[combined, rating], combined).astype(np.intp)
+    return combined
+
+
+def combine_grid(rows: np.ndarray) -> np.ndarray:
+    """
+    Combined value of every row of a (grid points × conditions) rating matrix
+
+    Rows that hold the same ratings in a different order are folded once.
+    """
+    rows = np.asarray(rows)
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64)
+    ordered = -np.sort(-pad_ratings(rows), axis=1)
+    distinct, inverse = np.unique(ordered, axis=0, return_inverse=True)
+    return combine_ratings_batch(distinct)[inverse.reshape(-1)]
@@ -3,20 +3,108 @@ VAC Canada ToD 2019 Rating Engine - Updated with data manager integration
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional
+import multiprocessing
+import uuid
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Any, Optional, Tuple
 import logging
-from app_simplified.core.vac_data import vac_data_manager
+from app_simplified.core.case_history import CaseHistoryStore
+from app_simplified.core.evidence import scan_evidence
+from app_simplified.core.result_cache import ResultCache, payload_key
+from app_simplified.core.routing import RATED as ROUTE_RATED
+from app_simplified.core.tables import RomTableEvaluator
+from app_simplified.core.vac_data import VACDataManager, vac_data_manager
+from app_simplified.rating.combination import (
+    MAX_RATING, combine_grid, combine_ratings, combine_ratings_batch, combine_with_each, pad_ratings
+)
+from app_simplified.rating.hearing import EARS, DSHLCalculator
 
 logger = logging.getLogger(__name__)
 
+# Largest Cartesian what-if grid /calculate/sensitivity will enumerate
+MAX_SENSITIVITY_GRID = 100_000
+
+
+def create_assessment_executor(kind: str = "thread", workers: int = 4) -> Executor:
+    """
+    Pool that runs ToD matching, evidence scans and condition assessment off the event loop
+    
+    "thread" shares the loaded rules; "process" sidesteps the GIL for the
+    fuzzy matching but each worker loads its own copy of the rules.
+    """
+    if kind == "process":
+        # spawn, not fork: the API process already runs threads
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    if kind != "thread":
+        raise ValueError(f"Unknown assessment executor '{kind}', expected 'thread' or 'process'")
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vac-assess")
+
+
+def resolve_condition_in_worker(condition_name: str, source_sha256: str) -> Optional[Dict[str, Any]]:
+    """Process-pool entry point: match one condition name on this worker's rules"""
+    rules = vac_data_manager.snapshot()
+    if rules.source_sha256 != source_sha256:
+        # The API reloaded its rules since this worker started
+        vac_data_manager.reload()
+        rules = vac_data_manager.snapshot()
+        if rules.source_sha256 != source_sha256:
+            logger.warning(f"Worker rules {rules.rules_version} differ from the API's ({source_sha256[:12]})")
+    return rules.find_condition(condition_name)
+
+
+# Engine owned by a process-pool worker, created on its first assessment
+_worker_engine = None
+
+def assess_condition_in_worker(
+    condition: Dict[str, Any],
+    evidence_hits: List[Dict[str, Any]],
+    tod_condition: Optional[Dict[str, Any]],
+    source_sha256: str
+) -> Dict[str, Any]:
+    """Process-pool entry point: assess one already-resolved condition on this worker's rules"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = VACRatingEngine()
+    
+    rules = _worker_engine.data_manager.snapshot()
+    if rules.source_sha256 != source_sha256:
+        # The API reloaded its rules since this worker started
+        _worker_engine.data_manager.reload()
+        rules = _worker_engine.data_manager.snapshot()
+        if rules.source_sha256 != source_sha256:
+            logger.warning(f"Worker rules {rules.rules_version} differ from the API's ({source_sha256[:12]})")
+    return _worker_engine._assess_condition(condition, evidence_hits, rules, tod_condition, resolved=True)
+
+
 class VACRatingEngine:
     """
     VAC Canada Table of Disabilities 2019 rating engine
     Integrates with VACDataManager for data access
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        result_cache: Optional[ResultCache] = None,
+        assessment_memo: Optional[ResultCache] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 8,
+        case_history: Optional[CaseHistoryStore] = None
+    ):
         self.data_manager = vac_data_manager
+        # Assessments are persisted here when a store is given
+        self.case_history = case_history
+        # None runs per-condition work on the event loop's default thread pool
+        self.executor = executor
+        self.condition_slots = asyncio.Semaphore(max_concurrency)
+        self.result_cache = result_cache or ResultCache()
+        # assessment_id -> {condition input hash: condition assessment}, for incremental reassessment
+        self.assessment_memo = assessment_memo or ResultCache(max_entries=256, ttl_seconds=3600)
+        # Cached results are keyed by rules version; drop them all when rules reload
+        self.data_manager.add_reload_listener(self.result_cache.clear)
+        self.data_manager.add_reload_listener(self.assessment_memo.clear)
         self._validate_data()
     
     def _validate_data(self):
@@ -32,27 +120,76 @@ class VACRatingEngine:
         Perform comprehensive VAC assessment of a veteran's case
         """
         try:
+            # The API passes the validated VACCasePayload model
+            if hasattr(case_data, "model_dump"):
+                case_data = case_data.model_dump()
+            
             # Extract conditions from case data
             conditions = case_data.get("conditions", [])
-            pre_existing = case_data.get("pre_existing", [])
+            pre_existing = case_data.get("pre_existing") or []
             medical_evidence = case_data.get("medical_evidence", [])
             
-            # Assess each condition
-            assessed_conditions = []
-            for condition in conditions:
-                assessment = await self._assess_condition(condition, medical_evidence)
-                assessed_conditions.append(assessment)
+            # Pin the active rules so a reload mid-assessment cannot mix versions
+            rules = self.data_manager.snapshot()
+            
+            # Re-submitted payloads are answered from the result cache, as a new assessment
+            cache_key = payload_key("assess", case_data, rules.rules_version)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                result = {**cached, "assessment_id": uuid.uuid4().hex, "assessed_at": datetime.now()}
+                memo = self.assessment_memo.get(cached["assessment_id"])
+                if memo is not None:
+                    self.assessment_memo.put(result["assessment_id"], memo)
+                if self.case_history:
+                    self.case_history.record(result)
+                return result
+            
+            # Match every condition and prior award name, and scan the evidence once, off the event loop
+            resolved = await self._resolve_conditions_concurrently(conditions + pre_existing, rules)
+            resolved, resolved_awards = resolved[:len(conditions)], resolved[len(conditions):]
+            evidence_hits = await self._scan_evidence(conditions, resolved, medical_evidence)
+            
+            # Conditions whose inputs are unchanged since the previous assessment are reused
+            previous_id = case_data.get("previous_assessment_id")
+            previous = (self.assessment_memo.get(previous_id) if previous_id else None) or {}
+            condition_keys = [
+                self._condition_key(c, hits, rules) for c, hits in zip(conditions, evidence_hits)
+            ]
+            changed = [i for i, key in enumerate(condition_keys) if key not in previous]
+            
+            assessed_conditions = [previous.get(key) for key in condition_keys]
+            fresh = await self._assess_conditions(
+                [conditions[i] for i in changed], [evidence_hits[i] for i in changed],
+                rules, [resolved[i] for i in changed]
+            )
+            for i, assessment in zip(changed, fresh):
+                assessed_conditions[i] = assessment
+            recomputed = set(changed)
+            reused_conditions = [c.get("name") for i, c in enumerate(conditions) if i not in recomputed]
+            
+            assessment_id = uuid.uuid4().hex
+            self.assessment_memo.put(assessment_id, dict(zip(condition_keys, assessed_conditions)))
+            
+            # Route overlapping manifestations and bracket conditions; only rated ones combine
+            assessed_conditions, brackets = self._route_conditions(assessed_conditions, resolved, resolved_awards, rules)
             
             # Calculate combined rating
             combined_rating = await self._calculate_combined_rating(
-                assessed_conditions, 
-                pre_existing
+                [c for c in assessed_conditions if c["routing"]["status"] == ROUTE_RATED],
+                pre_existing,
+                rules,
+                case_data.get("qol_level")
             )
+            if brackets:
+                combined_rating["brackets"] = brackets
             
             # Determine quality of life impact
             qol_impact = await self._assess_quality_of_life(assessed_conditions)
             
-            return {
+            result = {
+                "assessment_id": assessment_id,
+                "previous_assessment_id": previous_id,
+                "reused_conditions": reused_conditions,
                 "case_id": case_data.get("case_id"),
                 "assessment_date": case_data.get("assessment_date"),
                 "total_disability_rating": combined_rating["total_rating"],
@@ -61,22 +198,184 @@ class VACRatingEngine:
                 "quality_of_life_impact": qol_impact,
                 "recommendations": await self._generate_recommendations(assessed_conditions),
                 "tod_version": "VAC 2019",
-                "assessment_confidence": combined_rating.get("confidence", "medium")
+                "rules_version": rules.rules_version,
+                "assessment_confidence": combined_rating.get("confidence", "medium"),
+                "assessed_at": datetime.now()
             }
+            self.result_cache.put(cache_key, result)
+            if self.case_history:
+                self.case_history.record(result)
+            return result
             
         except Exception as e:
             logger.error(f"VAC assessment error: {e}")
             raise
     
-    async def _assess_condition(self, condition: Dict[str, Any], medical_evidence: List[Dict]) -> Dict[str, Any]:
-        """Assess a single condition using VAC ToD criteria with data manager"""
+    def _route_conditions(
+        self,
+        assessed: List[Dict[str, Any]],
+        resolved: List[Optional[Dict[str, Any]]],
+        resolved_awards: List[Optional[Dict[str, Any]]],
+        rules: VACDataManager
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Add each condition's routing entry; returns the routed conditions and active brackets"""
+        prior_award_chapters = [(award or {}).get("chapter") for award in resolved_awards]
+        routes, brackets = rules.condition_router.route(assessed, resolved, prior_award_chapters)
+        return [{**condition, "routing": route} for condition, route in zip(assessed, routes)], brackets
+    
+    def _condition_key(
+        self,
+        condition: Dict[str, Any],
+        evidence_hits: List[Dict[str, Any]],
+        rules: VACDataManager
+    ) -> str:
+        """
+        Hash of everything _assess_condition reads for one condition
+        
+        That is the condition itself, its evidence scan hits and the rules version.
+        """
+        return payload_key("condition", {"condition": condition, "evidence": evidence_hits}, rules.rules_version)
+    
+    def _resolve_conditions(
+        self,
+        conditions: List[Dict[str, Any]],
+        rules: VACDataManager,
+        memo: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Match each condition name to its ToD record once
+        
+        Repeated names in a case (or across cases sharing a memo) reuse the
+        first fuzzy match. Returns the ToD records in input order, None where
+        no match was found.
+        """
+        memo = {} if memo is None else memo
+        resolved = []
+        for condition in conditions:
+            key = (condition.get("name") or "").lower().strip()
+            if key not in memo:
+                memo[key] = rules.find_condition(key)
+            resolved.append(memo[key])
+        return resolved
+    
+    async def _resolve_conditions_concurrently(
+        self,
+        conditions: List[Dict[str, Any]],
+        rules: VACDataManager
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Match each distinct condition name on the executor
+        
+        At most max_concurrency names are in flight at a time, so the fuzzy
+        scoring never runs on the event loop. Returns ToD records in input
+        order, None where no match was found.
+        """
+        loop = asyncio.get_running_loop()
+        names = [(c.get("name") or "").lower().strip() for c in conditions]
+        distinct = list(dict.fromkeys(names))
+        
+        async def run(name: str) -> Optional[Dict[str, Any]]:
+            async with self.condition_slots:
+                if isinstance(self.executor, ProcessPoolExecutor):
+                    return await loop.run_in_executor(
+                        self.executor, resolve_condition_in_worker, name, rules.source_sha256
+                    )
+                return await loop.run_in_executor(self.executor, rules.find_condition, name)
+        
+        matches = dict(zip(distinct, await asyncio.gather(*(run(name) for name in distinct))))
+        return [matches[name] for name in names]
+    
+    async def _scan_evidence(
+        self,
+        conditions: List[Dict[str, Any]],
+        resolved: List[Optional[Dict[str, Any]]],
+        medical_evidence: List[Dict]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Scan every evidence document once for all of the case's conditions
+        
+        One multi-pattern automaton covers each condition's claimed and ToD
+        names, ToD keywords and symptoms. Returns per-condition document hits.
+        """
+        if not medical_evidence:
+            return [[] for _ in conditions]
+        
+        condition_terms = []
+        for condition, tod_condition in zip(conditions, resolved):
+            names = [condition.get("name") or ""]
+            supporting = list(condition.get("symptoms") or [])
+            if tod_condition:
+                names.append(tod_condition.get("name") or "")
+                supporting += (tod_condition.get("keywords") or []) + (tod_condition.get("symptoms") or [])
+            condition_terms.append((names, supporting))
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, scan_evidence, condition_terms, medical_evidence)
+    
+    async def _assess_conditions(
+        self,
+        conditions: List[Dict[str, Any]],
+        evidence_hits: List[List[Dict[str, Any]]],
+        rules: VACDataManager,
+        resolved: List[Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Assess already-resolved conditions on the executor, at most max_concurrency at a time
+        
+        Rating, table evaluation, DSHL and criteria run off the event loop.
+        Results are returned in input order.
+        """
+        loop = asyncio.get_running_loop()
+        
+        async def run(condition: Dict[str, Any], hits: List[Dict[str, Any]], tod_condition) -> Dict[str, Any]:
+            async with self.condition_slots:
+                if isinstance(self.executor, ProcessPoolExecutor):
+                    return await loop.run_in_executor(
+                        self.executor, assess_condition_in_worker,
+                        condition, hits, tod_condition, rules.source_sha256
+                    )
+                return await loop.run_in_executor(
+                    self.executor, partial(self._assess_condition, resolved=True),
+                    condition, hits, rules, tod_condition
+                )
+        
+        return list(await asyncio.gather(*(
+            run(condition, hits, tod_condition)
+            for condition, hits, tod_condition in zip(conditions, evidence_hits, resolved)
+        )))
+    
+    def _assess_condition(
+        self,
+        condition: Dict[str, Any],
+        evidence_hits: List[Dict[str, Any]],
+        rules: Optional[VACDataManager] = None,
+        tod_condition: Optional[Dict[str, Any]] = None,
+        resolved: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Assess a single condition using VAC ToD criteria with data manager
+        
+        evidence_hits are this condition's results from _scan_evidence.
+        tod_condition is the caller's match from _resolve_conditions. With
+        resolved=True a None tod_condition means "no match" and the name is
+        not matched again; otherwise a missing record is looked up here.
+        """
+        rules = rules or self.data_manager.snapshot()
         try:
             condition_name = condition.get("name", "")
             symptoms = condition.get("symptoms", [])
             severity = condition.get("severity", "")
             
-            # Use data manager to find condition
-            tod_condition = self.data_manager.find_condition(condition_name)
+            if tod_condition is None and not resolved:
+                tod_condition = rules.find_condition(condition_name)
+            
+            # Hearing loss claims may carry the audiogram instead of DSHL points
+            table_value = condition.get("table_value")
+            if table_value is None and condition.get("audiogram"):
+                dshl = self._get_dshl_calculator(rules).calculate(
+                    condition["audiogram"], condition.get("entitled_ears") or EARS
+                )
+                table_value = dshl["dshl"]
             
             if not tod_condition:
                 return {
@@ -88,16 +387,16 @@ class VACRatingEngine:
                 }
             
             # Use data manager's basic rating calculation
-            rating_result = self.data_manager.calculate_basic_rating(
+            rating_result = rules.calculate_basic_rating(
                 condition_name=condition_name,
                 severity=severity,
-                symptoms=symptoms
+                symptoms=symptoms,
+                tod_condition=tod_condition,
+                table_value=table_value
             )
             
             # Enhanced assessment with medical evidence
-            medical_evidence_support = await self._evaluate_medical_evidence(
-                condition_name, medical_evidence
-            )
+            medical_evidence_support = self._evaluate_medical_evidence(evidence_hits)
             
             return {
                 "condition": condition_name,
@@ -111,7 +410,9 @@ class VACRatingEngine:
                 "medical_evidence_support": medical_evidence_support,
                 "base_rating": rating_result.get("base_rating"),
                 "symptom_adjustment": rating_result.get("symptom_adjustment"),
-                "tod_criteria": rating_result.get("tod_criteria", {})
+                "tod_criteria": rating_result.get("tod_criteria", {}),
+                "table_evaluation": rating_result.get("table_evaluation"),
+                "contribution": condition.get("contribution")
             }
             
         except Exception as e:
@@ -145,8 +446,20 @@ class VACRatingEngine:
         
         return criteria_met
     
-    async def _calculate_combined_rating(self, conditions: List[Dict], pre_existing: List[Dict]) -> Dict[str, Any]:
-        """Calculate combined disability rating using VAC methodology"""
+    async def _calculate_combined_rating(
+        self,
+        conditions: List[Dict],
+        pre_existing: List[Dict],
+        rules: Optional[VACDataManager] = None,
+        qol_level: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate combined disability rating using VAC methodology
+        
+        Each condition's MI is transformed to MI' through Table 3.1 by its
+        contribution band, the MI' values are combined, and the Table 2.2 QOL
+        addition for the combined MI' is added before the payable cap.
+        """
         if not conditions:
             return {"total_rating": 0, "method": "no_conditions", "confidence": "low"}
         
@@ -157,31 +470,31 @@ class VACRatingEngine:
         if not individual_ratings:
             return {"total_rating": 0, "method": "no_valid_conditions", "confidence": "low"}
         
-        # VAC combination formula
+        rules = rules or self.data_manager.snapshot()
+        stage = rules.pct_qol_stage
+        contributions = [c.get("contribution") for c in valid_conditions]
+        mi_prime = stage.apply_pct(individual_ratings, contributions)
+        pct_adjustments = stage.describe_pct(
+            [int(r) for r in stage.clip_mi(individual_ratings)], contributions, mi_prime
+        )
+        
+        # VAC combined values, highest rating first; the cap applies after QOL
+        cap = self._get_payable_cap(rules)
+        combined_mi, ordered_ratings, lookups = combine_ratings(mi_prime)
+        qol_addition = stage.qol_addition(combined_mi, qol_level)
+        total_rating = min(combined_mi + qol_addition, cap)
+        
         if len(individual_ratings) == 1:
-            total_rating = individual_ratings[0]
             method = "single_condition"
             confidence = "high"
         else:
-            # VAC combination: A + B - (A × B / 100)
-            total_rating = individual_ratings[0]
-            for rating in individual_ratings[1:]:
-                total_rating = total_rating + rating - (total_rating * rating / 100)
-            
-            total_rating = int(round(total_rating))
             method = "vac_combination_formula"
             confidence = "medium"
         
-        # Apply pre-existing condition adjustments if any
-        pct_applied = False
-        if pre_existing:
-            # PCT logic would be implemented here
-            pct_applied = True
+        pct_applied = bool(pct_adjustments)
+        if pct_applied:
             confidence = "medium"  # Reduced confidence with PCT
         
-        # Ensure rating doesn't exceed 100%
-        total_rating = min(100, total_rating)
-        
         return {
             "total_rating": total_rating,
             "individual_ratings": individual_ratings,
@@ -191,25 +504,54 @@ class VACRatingEngine:
             "calculation_details": {
                 "valid_conditions": len(valid_conditions),
                 "total_conditions": len(conditions),
-                "combination_steps": self._get_combination_steps(individual_ratings)
+                "pre_existing_conditions": len(pre_existing or []),
+                "mi_prime_ratings": mi_prime,
+                "combined_mi": combined_mi,
+                "qol_level": qol_level,
+                "qol_addition": qol_addition,
+                "payable_cap_percent": cap,
+                "combination_steps": self._get_combination_steps(
+                    ordered_ratings, lookups, total_rating, pct_adjustments, qol_level, qol_addition
+                )
             }
         }
     
-    def _get_combination_steps(self, ratings: List[int]) -> List[str]:
-        """Get step-by-step combination calculation"""
-        if len(ratings) <= 1:
-            return [f"Single condition: {ratings[0] if ratings else 0}%"]
+    def _get_payable_cap(self, rules: VACDataManager) -> int:
+        """Payable cap from the ToD overall directions (100% when not specified)"""
+        overall_directions = rules.tod_data.get("overall_directions", {}) if rules.tod_data else {}
+        return int(overall_directions.get("payable_cap_percent", MAX_RATING))
+    
+    def _get_combination_steps(
+        self,
+        ordered_ratings: List[int],
+        lookups: List[Tuple[int, int, int]],
+        total_rating: int,
+        pct_adjustments: Optional[List[Tuple[int, Optional[str], int]]] = None,
+        qol_level: Optional[str] = None,
+        qol_addition: int = 0
+    ) -> List[str]:
+        """Describe the PCT, combined-values and QOL lookups that produced the total"""
+        steps = [
+            f"PCT (Table 3.1, {contribution}): MI {mi}% -> MI' {prime}%"
+            for mi, contribution, prime in pct_adjustments or []
+        ]
+        if len(ordered_ratings) <= 1:
+            steps.append(f"Single condition: {ordered_ratings[0] if ordered_ratings else 0}%")
+        else:
+            steps.append(f"Start with highest rating: {ordered_ratings[0]}%")
+            for i, (combined, rating, value) in enumerate(lookups, 1):
+                steps.append(f"Step {i}: {combined}% + {rating}% - ({combined}% × {rating}% ÷ 100) = {value}%")
         
-        steps = []
-        combined = ratings[0]
-        steps.append(f"Start with highest rating: {combined}%")
+        combined_mi = lookups[-1][2] if lookups else (ordered_ratings[0] if ordered_ratings else 0)
+        if qol_level:
+            steps.append(f"QOL addition (Table 2.2, {qol_level} at MI {combined_mi}%): +{qol_addition}%")
         
-        for i, rating in enumerate(ratings[1:], 1):
-            old_combined = combined
-            combined = combined + rating - (combined * rating / 100)
-            steps.append(f"Step {i}: {old_combined}% + {rating}% - ({old_combined}% × {rating}% ÷ 100) = {combined:.1f}%")
+        uncapped = combined_mi + qol_addition
+        if total_rating < uncapped:
+            steps.append(f"Payable cap applied: {uncapped}% limited to {total_rating}%")
         
-        steps.append(f"Final combined rating: {int(round(combined))}%")
+        if len(ordered_ratings) > 1 or qol_level:
+            steps.append(f"Final combined rating: {total_rating}%")
         return steps
     
     async def _assess_quality_of_life(self, conditions: List[Dict]) -> Dict[str, Any]:
@@ -315,34 +657,36 @@ class VACRatingEngine:
         
         return recommendations
     
-    async def _evaluate_medical_evidence(self, condition_name: str, medical_evidence: List[Dict]) -> Dict[str, Any]:
-        """Evaluate medical evidence support for condition"""
-        relevant_evidence = []
-        evidence_quality = "limited"
+    def _evaluate_medical_evidence(self, evidence_hits: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Evaluate medical evidence support for condition from its evidence scan hits"""
+        relevant_evidence = [
+            {
+                "source": hit["source"],
+                "relevance": hit["relevance"],
+                "match_count": hit["match_count"],
+                "first_name_position": hit["first_name_position"],
+                "first_term_position": hit["first_term_position"]
+            }
+            for hit in evidence_hits
+        ]
         
-        for evidence in medical_evidence:
-            evidence_content = evidence.get("content", "").lower()
-            evidence_source = evidence.get("source", "")
-            
-            if condition_name.lower() in evidence_content:
-                relevant_evidence.append({
-                    "source": evidence_source,
-                    "relevance": "high" if condition_name.lower() in evidence_content[:200] else "medium"
-                })
+        # Documents that only touch on keywords late in the text don't count towards adequacy
+        supporting = [e for e in relevant_evidence if e["relevance"] != "low"]
         
         # Assess evidence adequacy
-        if len(relevant_evidence) >= 3:
+        if len(supporting) >= 3:
             evidence_quality = "comprehensive"
-        elif len(relevant_evidence) >= 2:
+        elif len(supporting) >= 2:
             evidence_quality = "adequate"
-        elif len(relevant_evidence) == 1:
+        elif len(supporting) == 1:
             evidence_quality = "limited"
         else:
             evidence_quality = "insufficient"
         
         return {
-            "evidence_count": len(relevant_evidence),
-            "relevant_sources": [e["source"] for e in relevant_evidence],
+            "evidence_count": len(supporting),
+            "relevant_sources": [e["source"] for e in supporting],
+            "relevant_evidence": relevant_evidence,
             "quality_assessment": evidence_quality,
             "adequacy_for_rating": evidence_quality in ["adequate", "comprehensive"],
             "recommendations": self._get_evidence_recommendations(evidence_quality)
@@ -415,27 +759,333 @@ class VACRatingEngine:
         return recommendations
     
     async def calculate_rating(self, rating_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Direct rating calculation for specific conditions"""
+        """
+        Direct rating calculation for specific conditions
+        
+        Conditions are routed as in assess_case: only those routed "rated"
+        are combined, and active brackets are returned.
+        """
         conditions = rating_data.get("conditions", [])
-        pre_existing = rating_data.get("pre_existing", [])
+        pre_existing = rating_data.get("pre_existing") or []
+        rules = self.data_manager.snapshot()
         
-        # Assess each condition
-        assessed_conditions = []
-        for condition in conditions:
-            assessment = await self._assess_condition(condition, [])
-            assessed_conditions.append(assessment)
+        cache_key = payload_key("calculate", rating_data, rules.rules_version)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Match names, then assess the conditions, off the event loop
+        resolved = await self._resolve_conditions_concurrently(conditions + pre_existing, rules)
+        resolved, resolved_awards = resolved[:len(conditions)], resolved[len(conditions):]
+        assessed_conditions = await self._assess_conditions(conditions, [[] for _ in conditions], rules, resolved)
+        assessed_conditions, brackets = self._route_conditions(assessed_conditions, resolved, resolved_awards, rules)
         
         # Calculate combined rating
-        combined_rating = await self._calculate_combined_rating(assessed_conditions, pre_existing)
+        combined_rating = await self._calculate_combined_rating(
+            [c for c in assessed_conditions if c["routing"]["status"] == ROUTE_RATED],
+            pre_existing, rules, rating_data.get("qol_level")
+        )
         
-        return {
+        result = {
             "total_rating": combined_rating["total_rating"],
             "conditions": assessed_conditions,
             "method": combined_rating["method"],
             "pct_applied": combined_rating.get("pct_applied", False),
             "calculation_details": combined_rating.get("calculation_details", {}),
-            "confidence": combined_rating.get("confidence", "medium")
+            "confidence": combined_rating.get("confidence", "medium"),
+            "brackets": brackets,
+            "rules_version": rules.rules_version
+        }
+        self.result_cache.put(cache_key, result)
+        return result
+    
+    async def calculate_sensitivity(self, rating_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        What-if totals with conditions re-rated at each of their table levels
+        
+        Conditions are resolved and assessed once. By default each varied
+        condition is re-rated on its own with the others held at their current
+        ratings; with cartesian=True every combination of the varied
+        conditions' levels is enumerated. PCT, QOL and the payable cap are
+        applied exactly as in calculate_rating.
+        
+        Conditions are routed once for the baseline, as in calculate_rating;
+        only conditions routed "rated" (including each bracket's lead) can be
+        varied, and routing is not redone for the what-if levels.
+        
+        Args:
+            rating_data: calculate_rating input plus "vary" (condition indices,
+                default every rated condition found in the ToD) and "cartesian"
+        """
+        conditions = rating_data.get("conditions", [])
+        pre_existing = rating_data.get("pre_existing") or []
+        qol_level = rating_data.get("qol_level")
+        rules = self.data_manager.snapshot()
+        
+        resolved = await self._resolve_conditions_concurrently(conditions + pre_existing, rules)
+        resolved, resolved_awards = resolved[:len(conditions)], resolved[len(conditions):]
+        assessed = await self._assess_conditions(conditions, [[] for _ in conditions], rules, resolved)
+        assessed, brackets = self._route_conditions(assessed, resolved, resolved_awards, rules)
+        baseline = await self._calculate_combined_rating(
+            [a for a in assessed if a["routing"]["status"] == ROUTE_RATED], pre_existing, rules, qol_level
+        )
+        
+        stage = rules.pct_qol_stage
+        cap = self._get_payable_cap(rules)
+        qol_row = stage.qol_row(qol_level)
+        valid = [
+            i for i, a in enumerate(assessed)
+            if a.get("tod_found", False) and a["routing"]["status"] == ROUTE_RATED
+        ]
+        contribution_rows = {i: stage.contribution_row(conditions[i].get("contribution")) for i in valid}
+        mi_prime = {i: int(stage.pct[contribution_rows[i], stage.clip_mi(assessed[i]["rating"])]) for i in valid}
+        
+        vary = rating_data.get("vary")
+        vary = list(dict.fromkeys(vary)) if vary else valid
+        for i in vary:
+            if i not in mi_prime:
+                if 0 <= i < len(assessed) and assessed[i].get("tod_found", False):
+                    raise ValueError(f"Condition {i} cannot be varied: it was routed as {assessed[i]['routing']['status']}")
+                raise ValueError(f"Condition {i} cannot be varied: it was not found in the ToD")
+        
+        def totals_for(combined: np.ndarray) -> np.ndarray:
+            """QOL addition and payable cap on combined MI'"""
+            return np.minimum(combined + stage.qol[qol_row, combined], cap)
+        
+        # Each varied condition's levels, and the MI' each level gives it
+        levels = {i: rules.get_rating_levels(resolved[i], conditions[i].get("symptoms")) for i in vary}
+        candidates = {
+            i: stage.pct[contribution_rows[i], stage.clip_mi([level["rating"] for level in levels[i]])]
+            for i in vary
         }
+        
+        baseline_total = baseline["total_rating"]
+        varied = []
+        for i in vary:
+            others = [mi_prime[j] for j in valid if j != i]
+            totals = totals_for(combine_with_each(others, candidates[i]))
+            varied.append({
+                "index": i,
+                "condition": conditions[i].get("name"),
+                "tod_condition_id": assessed[i].get("tod_condition_id"),
+                "current_rating": assessed[i]["rating"],
+                "options": [
+                    {**level, "total_rating": int(total), "delta": int(total) - baseline_total}
+                    for level, total in zip(levels[i], totals)
+                ]
+            })
+        
+        result = {
+            "baseline_total_rating": baseline_total,
+            "conditions": varied,
+            "brackets": brackets,
+            "rules_version": rules.rules_version
+        }
+        
+        if rating_data.get("cartesian"):
+            shape = tuple(len(candidates[i]) for i in vary)
+            if int(np.prod(shape)) > MAX_SENSITIVITY_GRID:
+                raise ValueError(f"Sensitivity grid of {int(np.prod(shape))} points exceeds {MAX_SENSITIVITY_GRID}")
+            grid = np.stack(np.meshgrid(*(candidates[i] for i in vary), indexing="ij"), axis=-1).reshape(-1, len(vary))
+            fixed = [mi_prime[j] for j in valid if j not in vary]
+            rows = np.hstack([grid, np.tile(np.asarray(fixed, dtype=np.intp), (len(grid), 1))])
+            result["grid"] = {
+                "conditions": vary,
+                "shape": list(shape),
+                "totals": totals_for(combine_grid(rows)).reshape(shape).tolist()
+            }
+        
+        return result
+    
+    async def calculate_ratings_batch(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Rate many cases in one call
+        
+        Condition names are resolved through a memo shared by the whole batch,
+        and the combined totals for all cases come from one vectorised
+        combined-values pass. Conditions are routed as in calculate_rating;
+        only those routed "rated" are combined. Results are returned in input order.
+        """
+        rules = self.data_manager.snapshot()
+        
+        # Matching for the whole batch runs in a worker thread, off the event loop
+        assessed_cases, case_brackets = await asyncio.to_thread(self._assess_cases, cases, rules)
+        
+        valid_cases = [
+            [c for c in assessed if c.get("tod_found", False) and c["routing"]["status"] == ROUTE_RATED]
+            for assessed in assessed_cases
+        ]
+        case_ratings = [[c.get("rating", 0) for c in valid] for valid in valid_cases]
+        
+        # PCT and QOL stage as whole-batch array lookups; padded slots stay MI 0
+        stage = rules.pct_qol_stage
+        mi = pad_ratings(case_ratings)
+        contribution_rows = np.zeros_like(mi)
+        qol_rows = np.zeros(len(cases), dtype=np.intp)
+        errors = {}
+        for row, (case, valid) in enumerate(zip(cases, valid_cases)):
+            try:
+                contribution_rows[row, :len(valid)] = [stage.contribution_row(c.get("contribution")) for c in valid]
+                qol_rows[row] = stage.qol_row(case.get("qol_level"))
+            except ValueError as e:
+                # An unknown band fails only its own case
+                errors[row] = str(e)
+        mi_prime = stage.apply_pct_batch(mi, contribution_rows)
+        
+        combined_mi = combine_ratings_batch(mi_prime)
+        qol_additions = stage.qol_addition_batch(combined_mi, qol_rows)
+        totals = np.minimum(combined_mi + qol_additions, self._get_payable_cap(rules))
+        pct_flags = (mi_prime != mi).any(axis=1) if len(cases) else np.zeros(0, dtype=bool)
+        
+        results = []
+        for i, (case, assessed, ratings, brackets) in enumerate(zip(cases, assessed_cases, case_ratings, case_brackets)):
+            if i in errors:
+                results.append({"case_id": case.get("case_id"), "error": errors[i]})
+                continue
+            
+            if not assessed:
+                method, confidence = "no_conditions", "low"
+            elif not ratings:
+                method, confidence = "no_valid_conditions", "low"
+            elif len(ratings) == 1:
+                method, confidence = "single_condition", "high"
+            else:
+                method, confidence = "vac_combination_formula", "medium"
+            
+            pct_applied = bool(pct_flags[i])
+            if pct_applied:
+                confidence = "medium"  # Reduced confidence with PCT
+            
+            results.append({
+                "case_id": case.get("case_id"),
+                "total_rating": int(totals[i]),
+                "individual_ratings": ratings,
+                "mi_prime_ratings": mi_prime[i, :len(ratings)].tolist(),
+                "qol_addition": int(qol_additions[i]),
+                "conditions": assessed,
+                "method": method,
+                "pct_applied": pct_applied,
+                "confidence": confidence,
+                "brackets": brackets,
+                "rules_version": rules.rules_version
+            })
+        
+        return results
+    
+    def _assess_cases(
+        self,
+        cases: List[Dict[str, Any]],
+        rules: VACDataManager
+    ) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Assess and route every condition of every case, resolving names through one shared memo
+        
+        Returns the routed conditions and the active brackets of each case.
+        """
+        memo = {}
+        assessed_cases = []
+        case_brackets = []
+        for case in cases:
+            conditions = case.get("conditions", [])
+            resolved = self._resolve_conditions(conditions, rules, memo)
+            resolved_awards = self._resolve_conditions(case.get("pre_existing") or [], rules, memo)
+            assessed = [
+                self._assess_condition(condition, [], rules, tod_condition, resolved=True)
+                for condition, tod_condition in zip(conditions, resolved)
+            ]
+            assessed, brackets = self._route_conditions(assessed, resolved, resolved_awards, rules)
+            assessed_cases.append(assessed)
+            case_brackets.append(brackets)
+        return assessed_cases, case_brackets
+    
+    async def evaluate_table(self, table_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate a compiled ToD rating table
+        
+        Inputs by table type:
+        - numeric_band_table: {"value": 240}
+        - ordinal_levels: {"level": "MOD"}
+        - rom_table: {"measurements": {"Cervical": {"Flexion": 20}}}
+        - matrix_table: {"row": "About 1/2", "col": ">=95", "mi": 40}
+        - mi_bands (Table 2.2): {"mi": 35, "level": "L2"}
+        """
+        evaluator = self.data_manager.get_table_evaluator(table_id)
+        if evaluator is None:
+            raise KeyError(f"No compiled rating table '{table_id}'")
+        return evaluator.evaluate(inputs)
+    
+    async def evaluate_rom_batch(
+        self,
+        columns: List[Tuple[str, str]],
+        angles: List[List[Optional[float]]],
+        visit_ids: Optional[List[str]] = None,
+        table_id: str = "17.ROM_spine"
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify ROM goniometry for many visits in one vectorised call
+        
+        Args:
+            columns: (segment, motion) per angle column, e.g. ("Cervical", "Flexion")
+            angles: One row per visit, degrees; null where a motion was not measured
+            visit_ids: Optional identifiers echoed back per visit
+            table_id: Chapter 17 rom_table to rate against
+        """
+        evaluator = self.data_manager.get_table_evaluator(table_id)
+        if evaluator is None:
+            raise KeyError(f"No compiled rating table '{table_id}'")
+        if not isinstance(evaluator, RomTableEvaluator):
+            raise ValueError(f"Table '{table_id}' is not a ROM table")
+        
+        angle_array = np.array(
+            [[np.nan if a is None else a for a in row] for row in angles], dtype=np.float64
+        ).reshape(len(angles), len(columns))
+        batch = evaluator.evaluate_batch(columns, angle_array)
+        
+        level_names = np.array([None] + [evaluator.level_name(o) for o in range(len(evaluator.LEVEL_NAMES))], dtype=object)
+        motion_names = level_names[batch["motion_levels"] + 1]
+        segment_names = level_names[batch["segment_levels"] + 1]
+        levels = level_names[batch["level"] + 1]
+        
+        results = []
+        for i in range(len(angles)):
+            results.append({
+                "visit_id": visit_ids[i] if visit_ids else str(i),
+                "level": levels[i],
+                "segment_levels": dict(zip(evaluator.segments, segment_names[i])),
+                "motion_levels": [
+                    {"segment": segment, "motion": motion, "angle": angles[i][j], "level": motion_names[i, j]}
+                    for j, (segment, motion) in enumerate(columns)
+                ]
+            })
+        return results
+    
+    def _get_dshl_calculator(self, rules: VACDataManager) -> DSHLCalculator:
+        """DSHL calculator configured from the rules' global method and Table 9.1"""
+        methods = rules.tod_data.get("global", {}).get("calculation_methods", {}) if rules.tod_data else {}
+        return DSHLCalculator(methods.get("DSHL", {}), rules.get_table_evaluator("9.1_hearing_loss"))
+    
+    async def calculate_dshl(
+        self,
+        audiogram: Dict[str, Dict[str, float]],
+        entitled_ears: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """DSHL and Table 9.1 band for one audiogram"""
+        calculator = self._get_dshl_calculator(self.data_manager.snapshot())
+        return calculator.calculate(audiogram, entitled_ears or EARS)
+    
+    async def calculate_dshl_batch(
+        self,
+        audiograms: List[List[List[float]]],
+        entitled: Optional[List[List[bool]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        DSHL and Table 9.1 bands for many audiograms in one vectorised pass
+        
+        audiograms is (N × 2 ears × 4|5 frequencies): right/left, 500/1000/2000/3000[/4000] Hz
+        """
+        calculator = self._get_dshl_calculator(self.data_manager.snapshot())
+        entitled_array = np.asarray(entitled, dtype=bool) if entitled is not None else None
+        return calculator.results(calculator.calculate_batch(np.asarray(audiograms), entitled_array))
     
     async def get_conditions(self, chapter: Optional[str] = None, search_term: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get list of VAC ToD conditions using data manager"""
@@ -484,14 +1134,14 @@ class VACRatingEngine:
             logger.error(f"Error getting chapters: {e}")
             return []
     
-    async def get_case_history(self, case_id: str) -> List[Dict[str, Any]]:
-        """Get assessment history for a case (placeholder - would use database)"""
-        return [
-            {
-                "assessment_date": "2024-01-15",
-                "total_rating": 45,
-                "conditions_assessed": 3,
-                "assessor": "VAC Assessment System",
-                "notes": "Initial comprehensive assessment"
-            }
-        ]
+    async def get_case_history(
+        self,
+        case_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include_results: bool = False
+    ) -> Dict[str, Any]:
+        """Page of a case's stored assessments, newest first"""
+        if not self.case_history:
+            return {"assessments": [], "next_cursor": None}
+        return await asyncio.to_thread(self.case_history.get_history, case_id, limit, cursor, include_results)
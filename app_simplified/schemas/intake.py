@@ -3,7 +3,7 @@ Pydantic schemas for VAC assessment requests
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # Input schemas
@@ -14,6 +14,10 @@ class VACCondition(BaseModel):
     severity: str = Field(..., description="Severity level (mild, moderate, severe, very_severe, extreme)")
     onset_date: Optional[str] = Field(None, description="When condition began")
     service_connection: Optional[str] = Field(None, description="How condition relates to military service")
+    table_value: Optional[Any] = Field(None, description="ToD table input: level code, or numeric measurement for band tables (e.g. DSHL points)")
+    audiogram: Optional[Dict[str, Dict[str, float]]] = Field(None, description="Hearing thresholds by ear and frequency, used to derive DSHL points")
+    entitled_ears: Optional[List[str]] = Field(None, description="Entitled ears for DSHL (right, left); defaults to both")
+    contribution: Optional[str] = Field(None, description="Table 3.1 PCT contribution band (e.g. 'About 1/2'); omitted means fully service related")
 
 class VACCasePayload(BaseModel):
     """Complete VAC assessment case payload"""
@@ -23,8 +27,46 @@ class VACCasePayload(BaseModel):
     pre_existing: Optional[List[VACCondition]] = Field(default=[], description="Pre-existing conditions for PCT calculations")
     medical_evidence: Optional[List[Dict[str, Any]]] = Field(default=[], description="Medical evidence documents")
     quality_of_life_statement: Optional[str] = Field(None, description="Veteran's quality of life impact statement")
+    qol_level: Optional[str] = Field(None, description="Table 2.2 QOL level (L1-L3) added to the combined MI")
     prior_assessments: Optional[List[Dict]] = Field(default=[], description="Previous VAC assessments")
     assessment_date: Optional[str] = Field(None, description="Date of assessment")
+    previous_assessment_id: Optional[str] = Field(None, description="Earlier assessment of this case; unchanged conditions are reused from it")
+
+class VACRatingCase(BaseModel):
+    """Conditions for one case in a batch rating request"""
+    case_id: Optional[str] = Field(None, description="Unique case identifier")
+    conditions: List[Dict[str, Any]] = Field(..., description="Conditions with severity ratings")
+    pre_existing: Optional[List[Dict[str, Any]]] = Field(default=[], description="Pre-existing conditions for PCT calculations")
+    qol_level: Optional[str] = Field(None, description="Table 2.2 QOL level (L1-L3)")
+
+class VACSensitivityRequest(BaseModel):
+    """What-if grid over condition levels for /calculate/sensitivity"""
+    conditions: List[Dict[str, Any]] = Field(..., description="Conditions with severity ratings, as for /calculate")
+    pre_existing: Optional[List[Dict[str, Any]]] = Field(default=[], description="Pre-existing conditions for PCT calculations")
+    qol_level: Optional[str] = Field(None, description="Table 2.2 QOL level (L1-L3)")
+    vary: Optional[List[int]] = Field(None, description="Indices of conditions to vary; defaults to every condition found in the ToD")
+    cartesian: bool = Field(default=False, description="Also return totals for every combination of the varied conditions' levels")
+
+class VACRatingBatchRequest(BaseModel):
+    """Many cases rated in one /calculate/batch call"""
+    cases: List[VACRatingCase] = Field(..., description="Cases to rate, results are returned in this order")
+
+class DSHLRequest(BaseModel):
+    """Single audiogram for a Chapter 9 DSHL calculation"""
+    audiogram: Dict[str, Dict[str, float]] = Field(..., description="Thresholds (dB HL) by ear then frequency, e.g. {'right': {'500': 25, ...}}")
+    entitled_ears: List[str] = Field(default=["right", "left"], description="Ears with hearing loss entitlement")
+
+class DSHLBatchRequest(BaseModel):
+    """Bulk audiograms, e.g. from an audiology export"""
+    audiograms: List[List[List[float]]] = Field(..., description="N x 2 ears (right, left) x 500/1000/2000/3000[/4000] Hz thresholds")
+    entitled: Optional[List[List[bool]]] = Field(None, description="N x 2 entitlement flags (right, left); defaults to both ears")
+
+class ROMBatchRequest(BaseModel):
+    """Goniometry for many visits, e.g. a physiotherapy intake export"""
+    columns: List[Tuple[str, str]] = Field(..., description="(segment, motion) per angle column, e.g. ['Cervical', 'Flexion']")
+    angles: List[List[Optional[float]]] = Field(..., description="One row per visit in column order, degrees; null if not measured")
+    visit_ids: Optional[List[str]] = Field(None, description="Optional identifier per visit row")
+    table_id: str = Field(default="17.ROM_spine", description="Chapter 17 ROM table")
 
 class ChatRequest(BaseModel):
     """Chat request for VAC assessment conversation"""
@@ -18,6 +18,9 @@ class VACConditionAssessment(BaseModel):
     symptoms_matched: Optional[List[str]] = Field(None, description="Symptoms that matched ToD criteria")
     assessment_criteria_met: Optional[List[str]] = Field(None, description="Assessment criteria satisfied")
     medical_evidence_support: Optional[Dict[str, Any]] = Field(None, description="Medical evidence evaluation")
+    table_evaluation: Optional[Dict[str, Any]] = Field(None, description="ToD table level or band the rating was taken from")
+    contribution: Optional[str] = Field(None, description="Table 3.1 PCT contribution band applied to this condition")
+    routing: Optional[Dict[str, Any]] = Field(None, description="Chapter the condition was routed to and whether it was rated, bracketed, suppressed or overlapping")
 
 class VACQualityOfLifeAssessment(BaseModel):
     """Quality of life impact assessment"""
@@ -33,9 +36,13 @@ class VACCombinedRating(BaseModel):
     method: str = Field(..., description="Calculation method used")
     pct_applied: bool = Field(..., description="Whether pre-existing condition table was applied")
     confidence: str = Field(..., description="Assessment confidence level")
+    brackets: Optional[List[Dict[str, Any]]] = Field(None, description="Conditions rated together as one bracket, per chapter")
 
 class VACAssessmentResult(BaseModel):
     """Complete VAC assessment result"""
+    assessment_id: Optional[str] = Field(None, description="Identifier to pass as previous_assessment_id on reassessment")
+    previous_assessment_id: Optional[str] = Field(None, description="Assessment this one was computed incrementally from")
+    reused_conditions: List[str] = Field(default=[], description="Conditions whose results were reused unchanged from the previous assessment")
     case_id: Optional[str] = Field(None, description="Case identifier")
     assessment_date: Optional[str] = Field(None, description="Date of assessment")
     total_disability_rating: int = Field(..., description="Final disability rating percentage")
@@ -44,6 +51,7 @@ class VACAssessmentResult(BaseModel):
     quality_of_life_impact: VACQualityOfLifeAssessment = Field(..., description="Quality of life assessment")
     recommendations: List[str] = Field(..., description="Overall recommendations")
     tod_version: str = Field(default="VAC 2019", description="Table of Disabilities version")
+    rules_version: Optional[str] = Field(None, description="Version of the loaded ToD rules file")
     assessment_confidence: str = Field(..., description="Overall confidence in assessment")
     assessed_at: datetime = Field(default_factory=datetime.now, description="Timestamp of assessment")
     assessor: str = Field(default="VAC Assessment System", description="System or person who performed assessment")
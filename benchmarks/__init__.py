@@ -0,0 +1,3 @@
+"""
+Rating engine benchmark suite
+"""
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+VAC rating engine benchmarks.
+
+Measures p50/p99 latency and throughput of condition matching, search,
+combined rating and case assessment (single and batched) at 1, 10 and 100
+conditions per case, over seeded synthetic cases. Results can be saved as a
+JSON baseline and later runs compared against it.
+
+Run from the repository root:
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+import numpy as np
+
+from app_simplified.core.result_cache import ResultCache
+from app_simplified.core.vac_data import vac_data_manager
+from app_simplified.rating.vac_canada import VACRatingEngine
+from benchmarks.synthetic import SyntheticCaseGenerator
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+CONDITION_COUNTS = (1, 10, 100)
+
+# Cases per call for the batch benchmarks
+BATCH_SIZE = 50
+
+# Untimed calls before each benchmark
+WARMUP = 3
+
+
+def summarize(timings: List[float], items_per_call: int = 1) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput (items per second)"""
+    values = np.asarray(timings) * 1000
+    return {
+        "calls": len(timings),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "mean_ms": round(float(values.mean()), 4),
+        "throughput_per_s": round(len(timings) * items_per_call / (values.sum() / 1000), 2) if values.sum() else None
+    }
+
+
+def measure(func: Callable, inputs: List[Any], items_per_call: int = 1) -> Dict[str, Any]:
+    for value in inputs[:WARMUP]:
+        func(value)
+    timings = []
+    for value in inputs:
+        started = time.perf_counter()
+        func(value)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, items_per_call)
+
+
+async def measure_async(func: Callable, inputs: List[Any], items_per_call: int = 1) -> Dict[str, Any]:
+    for value in inputs[:WARMUP]:
+        await func(value)
+    timings = []
+    for value in inputs:
+        started = time.perf_counter()
+        await func(value)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, items_per_call)
+
+
+async def run_suite(iterations: int, seed: int, only: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark whose name contains only (all when None)"""
+    rules = vac_data_manager.snapshot()
+    generator = SyntheticCaseGenerator(rules, seed=seed)
+    # No result caching or reassessment memo, so every call does the full work
+    engine = VACRatingEngine(result_cache=ResultCache(max_entries=0), assessment_memo=ResultCache(max_entries=0))
+    results = {}
+
+    def wanted(name: str) -> bool:
+        selected = only is None or only in name
+        if selected:
+            print(f"  {name} ...", file=sys.stderr, flush=True)
+        return selected
+
+    queries = generator.queries(iterations)
+    if wanted("find_condition"):
+        def find_uncached(query: str):
+            # Clear the per-snapshot memo so each lookup runs the matcher
+            rules._match_memo.clear()
+            return rules.find_condition(query)
+        results["find_condition"] = measure(find_uncached, queries)
+    if wanted("search_conditions"):
+        results["search_conditions"] = measure(rules.search_conditions, queries)
+
+    for count in CONDITION_COUNTS:
+        # Fewer calls for the largest cases keep a full run to a few minutes
+        calls = max(10, iterations // max(1, count // 10))
+        cases = generator.cases(calls, count)
+
+        name = f"combined_rating[{count}]"
+        if wanted(name):
+            assessed, _ = engine._assess_cases(cases, rules)
+            results[name] = await measure_async(lambda a: engine._calculate_combined_rating(a, [], rules), assessed)
+
+        name = f"assess_case[{count}]"
+        if wanted(name):
+            results[name] = await measure_async(engine.assess_case, cases)
+
+        batches = [generator.cases(BATCH_SIZE, count) for _ in range(max(3, calls // BATCH_SIZE))]
+        name = f"assess_case_concurrent[{count}x{BATCH_SIZE}]"
+        if wanted(name):
+            async def assess_batch(batch):
+                return await asyncio.gather(*(engine.assess_case(case) for case in batch))
+            results[name] = await measure_async(assess_batch, batches, BATCH_SIZE)
+
+        name = f"calculate_ratings_batch[{count}x{BATCH_SIZE}]"
+        if wanted(name):
+            results[name] = await measure_async(engine.calculate_ratings_batch, batches, BATCH_SIZE)
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Print p50 changes against the baseline; returns the benchmarks that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':44} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            print(f"{name:44} {'-':>10} {current['p50_ms']:>10.3f} {'new':>8}")
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1 if previous["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:44} {previous['p50_ms']:>10.3f} {current['p50_ms']:>10.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the VAC rating engine")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per benchmark (scaled down for 100-condition cases)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic case generator seed")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="Write results as a JSON baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    print(f"Running benchmarks (seed {args.seed}, {args.iterations} iterations)", file=sys.stderr)
+    results = asyncio.run(run_suite(args.iterations, args.seed, args.only))
+
+    print(f"\n{'benchmark':44} {'p50 ms':>10} {'p99 ms':>10} {'per s':>12}")
+    for name, summary in results.items():
+        print(f"{name:44} {summary['p50_ms']:>10.3f} {summary['p99_ms']:>10.3f} {summary['throughput_per_s'] or 0:>12.1f}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(),
+                "seed": args.seed,
+                "iterations": args.iterations,
+                "rules_version": vac_data_manager.rules_version,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "results": results
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.save}", file=sys.stderr)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmarks regressed more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Seeded synthetic VAC cases drawn from the ToD vocabulary
+Condition names (with typos and synonyms), severities and evidence blobs
+"""
+
+import random
+import re
+from typing import Dict, List, Any
+
+from app_simplified.core.vac_data import VACDataManager
+
+# Leading table number in ToD condition names ("20.1 Cognition")
+TABLE_NUMBER = re.compile(r"^\d+(\.\d+)*\s+")
+
+EVIDENCE_SOURCES = ("Medical Questionnaire", "Discharge Summary", "Specialist Report", "Service Medical Record")
+
+FILLER = (
+    "patient", "reports", "history", "of", "with", "and", "the", "on", "examination", "noted",
+    "denies", "since", "service", "follow", "up", "plan", "review", "stable", "daily", "weeks"
+)
+
+
+class SyntheticCaseGenerator:
+    """
+    Reproducible case payloads for benchmarks
+
+    The same seed and rules always give the same sequence of cases. Names are
+    the ToD name, its name without table number, or one of its keywords or
+    symptoms (a synonym), with typo_rate of them misspelt by one edit.
+    """
+
+    def __init__(self, rules: VACDataManager, seed: int = 0, typo_rate: float = 0.2, synonym_rate: float = 0.3):
+        self.random = random.Random(seed)
+        self.typo_rate = typo_rate
+        self.synonym_rate = synonym_rate
+        self.case_count = 0
+        self.conditions = []
+        vocabulary = set()
+
+        for condition in rules.conditions_index.values():
+            name = condition.get("name", "")
+            synonyms = [t for t in (condition.get("keywords") or []) + (condition.get("symptoms") or []) if t]
+            evaluator = rules.get_table_evaluator(condition.get("table_reference", ""))
+            band_table = evaluator is not None and evaluator.table_type == "numeric_band_table"
+            levels = [level["level"] for level in rules.get_rating_levels(condition)]
+            self.conditions.append({
+                "names": [name, TABLE_NUMBER.sub("", name)],
+                "synonyms": synonyms,
+                "symptoms": list(condition.get("symptoms") or []),
+                "levels": levels,
+                "band_table": band_table
+            })
+            text = " ".join([name, condition.get("description", "")] + synonyms)
+            for level in (condition.get("rating_criteria") or {}).get("levels") or []:
+                text += " " + " ".join(level.get("criteria") or [])
+            vocabulary.update(w for w in re.findall(r"[a-z]+", text.lower()) if len(w) > 2)
+
+        self.vocabulary = sorted(vocabulary)
+
+    def typo(self, text: str) -> str:
+        """One random deletion, duplication or transposition"""
+        if len(text) < 4:
+            return text
+        i = self.random.randrange(1, len(text) - 2)
+        edit = self.random.randrange(3)
+        if edit == 0:
+            return text[:i] + text[i + 1:]
+        if edit == 1:
+            return text[:i] + text[i] + text[i:]
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+    def condition_name(self, spec: Dict[str, Any]) -> str:
+        if spec["synonyms"] and self.random.random() < self.synonym_rate:
+            name = self.random.choice(spec["synonyms"])
+        else:
+            name = self.random.choice(spec["names"])
+        return self.typo(name) if self.random.random() < self.typo_rate else name
+
+    def condition(self) -> Dict[str, Any]:
+        """One VACCondition payload"""
+        spec = self.random.choice(self.conditions)
+        condition = {
+            "name": self.condition_name(spec),
+            "severity": self.random.choice(spec["levels"]),
+            "symptoms": self.random.sample(spec["symptoms"], k=min(len(spec["symptoms"]), self.random.randint(0, 3)))
+        }
+        if spec["band_table"]:
+            condition["table_value"] = self.random.randint(0, 600)
+        return condition
+
+    def evidence(self, names: List[str], words: int = 300) -> Dict[str, Any]:
+        """Evidence document mentioning some of the case's conditions among ToD vocabulary"""
+        text = [self.random.choice(self.vocabulary if self.random.random() < 0.5 else FILLER) for _ in range(words)]
+        for name in self.random.sample(names, k=min(len(names), 3)):
+            text.insert(self.random.randrange(len(text) + 1), name)
+        return {"source": self.random.choice(EVIDENCE_SOURCES), "content": " ".join(text)}
+
+    def case(self, conditions: int, documents: int = 2, words: int = 300) -> Dict[str, Any]:
+        """One VACCasePayload with the given number of conditions and evidence documents"""
+        self.case_count += 1
+        case_conditions = [self.condition() for _ in range(conditions)]
+        names = [c["name"] for c in case_conditions]
+        return {
+            "case_id": f"synthetic-{self.case_count:06d}",
+            "conditions": case_conditions,
+            "medical_evidence": [self.evidence(names, words) for _ in range(documents)]
+        }
+
+    def cases(self, count: int, conditions: int, documents: int = 2, words: int = 300) -> List[Dict[str, Any]]:
+        return [self.case(conditions, documents, words) for _ in range(count)]
+
+    def queries(self, count: int) -> List[str]:
+        """Condition names as a claimant might type them"""
+        return [self.condition_name(self.random.choice(self.conditions)) for _ in range(count)]
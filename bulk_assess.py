@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Offline bulk assessment of archived VAC case files.
+
+Loads the ToD rules pack once, then fans case JSON files out to a
+multiprocessing pool. On platforms with fork the workers inherit the parent's
+indexes instead of reloading the rules. Each file may hold one VACCasePayload
+or a list of them.
+
+Run from the repository root:
+    python bulk_assess.py cases/ -o results.jsonl
+    python bulk_assess.py cases/ -o results.csv --workers 8
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+# Loads the rules (from the rules pack when it is current) before any worker starts
+from app_simplified.rating.vac_canada import VACRatingEngine
+from app_simplified.core.result_cache import ResultCache
+from app_simplified.schemas.intake import VACCasePayload
+from app_simplified.schemas.results import VACAssessmentResult
+
+CSV_FIELDS = [
+    "file", "case_id", "assessment_id", "total_disability_rating", "conditions_assessed",
+    "assessment_confidence", "rules_version", "error"
+]
+
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 2.0
+
+# Created in the parent and inherited by forked workers; spawned workers build their own
+_engine: Optional[VACRatingEngine] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def create_engine() -> VACRatingEngine:
+    """Engine without result caching - every archived case is assessed once"""
+    return VACRatingEngine(result_cache=ResultCache(max_entries=0), assessment_memo=ResultCache(max_entries=0))
+
+
+def init_worker():
+    """Give each worker one event loop, and an engine when it was not inherited"""
+    global _engine, _loop
+    if _engine is None:
+        _engine = create_engine()
+    _loop = asyncio.new_event_loop()
+
+
+def assess_file(path: str) -> List[Dict[str, Any]]:
+    """Assess every case in one file; errors are returned per case, never raised"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        return [{"file": path, "error": f"Could not read case file: {e}"}]
+
+    records = []
+    for case in data if isinstance(data, list) else [data]:
+        case_id = case.get("case_id") if isinstance(case, dict) else None
+        try:
+            payload = VACCasePayload.model_validate(case)
+            result = _loop.run_until_complete(_engine.assess_case(payload))
+            records.append({"file": path, **VACAssessmentResult.model_validate(result).model_dump(mode="json")})
+        except ValidationError as e:
+            records.append({"file": path, "case_id": case_id, "error": f"Invalid case payload: {e.errors(include_url=False)}"})
+        except Exception as e:
+            records.append({"file": path, "case_id": case_id, "error": str(e)})
+    return records
+
+
+def find_case_files(inputs: List[str], pattern: str) -> List[str]:
+    """Case files named on the command line or matching pattern under directories"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.rglob(pattern)))
+        else:
+            files.append(str(path))
+    return files
+
+
+def csv_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary columns for one assessment record"""
+    return {
+        "file": record.get("file"),
+        "case_id": record.get("case_id"),
+        "assessment_id": record.get("assessment_id"),
+        "total_disability_rating": record.get("total_disability_rating"),
+        "conditions_assessed": len(record.get("individual_conditions") or []) if "error" not in record else None,
+        "assessment_confidence": record.get("assessment_confidence"),
+        "rules_version": record.get("rules_version"),
+        "error": record.get("error")
+    }
+
+
+def run_pool(files: List[str], workers: int, chunksize: int) -> Iterator[List[Dict[str, Any]]]:
+    """Per-file results in completion order"""
+    global _engine
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _engine = create_engine()
+    else:
+        # No fork (Windows): each worker loads the rules pack itself
+        context = multiprocessing.get_context("spawn")
+
+    with context.Pool(processes=workers, initializer=init_worker) as pool:
+        yield from pool.imap_unordered(assess_file, files, chunksize=chunksize)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Assess archived VAC case files in bulk")
+    parser.add_argument("inputs", nargs="+", help="Case JSON files or directories of them")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from the output suffix)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--pattern", default="*.json", help="File pattern inside input directories")
+    parser.add_argument("--chunksize", type=int, default=8, help="Files handed to a worker at a time")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    files = find_case_files(args.inputs, args.pattern)
+    if not files:
+        print(f"❌ No case files found in {args.inputs}", file=sys.stderr)
+        return 1
+
+    print(f"Assessing {len(files)} case files with {args.workers} workers -> {args.output} ({output_format})", file=sys.stderr)
+    started = last_progress = time.perf_counter()
+    done_files = cases = errors = 0
+
+    with open(args.output, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS) if output_format == "csv" else None
+        if writer:
+            writer.writeheader()
+
+        for records in run_pool(files, args.workers, args.chunksize):
+            done_files += 1
+            for record in records:
+                cases += 1
+                errors += "error" in record
+                if writer:
+                    writer.writerow(csv_row(record))
+                else:
+                    out.write(json.dumps(record, default=str) + "\n")
+
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                last_progress = now
+                print(f"  {done_files}/{len(files)} files, {cases} cases, {errors} errors, "
+                      f"{cases / (now - started):.1f} cases/s", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {cases} cases from {done_files} files in {elapsed:.2f}s "
+          f"({cases / elapsed if elapsed else 0:.1f} cases/s, {errors} errors)", file=sys.stderr)
+    return 0 if not errors else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
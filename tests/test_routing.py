@@ -0,0 +1,66 @@
+"""
+ConditionRouter bracketing over a minimal Chapter 21 policy
+"""
+
+from app_simplified.core.routing import BRACKETED, RATED, ConditionRouter
+
+TOD_DATA = {
+    "chapters": {
+        "21": {
+            "policy": {
+                "auto_bracket_psychiatric_conditions": True,
+                "bracket_activation_criteria": {
+                    "trigger_if_any_entitled_diagnoses": ["PTSD", "Depression"],
+                    "evidence_signals": ["prior_awards.chapter==21"]
+                }
+            }
+        }
+    }
+}
+
+PSYCHIATRIC = {"id": "21_21.1_psychiatric", "name": "21.1 Psychiatric", "chapter": "21"}
+
+
+def assessed(name, rating, chapter="unknown", tod_found=False):
+    return {"condition": name, "rating": rating, "chapter": chapter, "tod_found": tod_found}
+
+
+def test_claimed_ptsd_without_tod_match_brackets_psychiatric_condition():
+    router = ConditionRouter(TOD_DATA)
+    conditions = [
+        assessed("PTSD", 0),
+        assessed("21.1 Psychiatric", 13, chapter="21", tod_found=True),
+    ]
+
+    routes, brackets = router.route(conditions, [None, PSYCHIATRIC])
+
+    assert [b["chapter"] for b in brackets] == ["21"]
+    assert brackets[0]["members"] == ["PTSD", "21.1 Psychiatric"]
+    assert brackets[0]["lead"] == "21.1 Psychiatric"
+    assert brackets[0]["rating"] == 13
+    assert routes[0]["bracket"] == "21" and routes[0]["status"] == BRACKETED
+    assert routes[1]["bracket"] == "21" and routes[1]["status"] == RATED
+
+
+def test_psychiatric_condition_alone_is_not_bracketed():
+    router = ConditionRouter(TOD_DATA)
+
+    routes, brackets = router.route(
+        [assessed("21.1 Psychiatric", 13, chapter="21", tod_found=True)], [PSYCHIATRIC]
+    )
+
+    assert brackets == []
+    assert routes[0]["status"] == RATED and routes[0]["bracket"] is None
+
+
+def test_unmatched_condition_without_trigger_stays_out_of_bracket():
+    router = ConditionRouter(TOD_DATA)
+    conditions = [
+        assessed("Tinnitus", 0),
+        assessed("Psychiatric depression", 13, chapter="21", tod_found=True),
+    ]
+
+    routes, brackets = router.route(conditions, [None, PSYCHIATRIC])
+
+    assert brackets[0]["members"] == ["Psychiatric depression"]
+    assert routes[0]["bracket"] is None and routes[0]["status"] == RATED